@@ -13,6 +13,13 @@ REGION = os.environ.get("CDK_DEPLOY_REGION")
 # If REGION is still None, it will use the default region when deployed
 env = cdk.Environment(region=REGION) if REGION else None
 
+# Looking up an existing VPC ("-c vpcId=vpc-...") requires an explicit account and region
+if app.node.try_get_context("vpcId"):
+    env = cdk.Environment(
+        account=os.environ.get("CDK_DEFAULT_ACCOUNT"),
+        region=REGION or os.environ.get("CDK_DEFAULT_REGION"),
+    )
+
 APP_PREFIX = f"WA-IaC-Analyzer-{REGION or 'default'}"
 
 # Create the front-end Stack
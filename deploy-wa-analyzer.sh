@@ -355,6 +355,9 @@ deploy_stack() {
     # Set container runtime for building the CDK container images
     export CDK_DOCKER=$CONTAINER_TOOL
     echo "Using container runtime: $CONTAINER_TOOL"
+
+    # The image Dockerfiles use RUN --mount=type=cache, which needs BuildKit (Finch always uses it)
+    export DOCKER_BUILDKIT=1
     
     # Bootstrap CDK if needed
     echo "Bootstrapping CDK (if needed) in AWS account $AWS_ACCOUNT and region $REGION..."
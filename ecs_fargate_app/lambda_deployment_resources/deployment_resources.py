@@ -0,0 +1,109 @@
+import logging
+
+import boto3
+from botocore.exceptions import ClientError
+
+# Set up logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+bedrock_agent_client = boto3.client("bedrock-agent")
+wellarchitected_client = boto3.client("wellarchitected")
+lambda_client = boto3.client("lambda")
+
+
+def start_ingestion(event):
+    """
+    Start the initial Knowledge Base ingestion job. Updates and deletes are no-ops.
+    """
+    if event["RequestType"] != "Create":
+        return {"PhysicalResourceId": event["PhysicalResourceId"]}
+
+    properties = event["ResourceProperties"]
+    response = bedrock_agent_client.start_ingestion_job(
+        knowledgeBaseId=properties["KnowledgeBaseId"],
+        dataSourceId=properties["DataSourceId"],
+    )
+    ingestion_job_id = response["ingestionJob"]["ingestionJobId"]
+    logger.info(f"Started ingestion job: {ingestion_job_id}")
+    return {"PhysicalResourceId": ingestion_job_id}
+
+
+def manage_workload(event):
+    """
+    Create the test Well-Architected workload on create and delete it on delete.
+    Updates keep the existing workload and return its id without calling the WA Tool API.
+    The CloudFormation request id is the idempotency token, so each create and delete
+    gets its own token while retries of the same request stay idempotent.
+    """
+    request_type = event["RequestType"]
+
+    if request_type == "Create":
+        workload_params = event["ResourceProperties"]["Workload"]
+        response = wellarchitected_client.create_workload(
+            **workload_params, ClientRequestToken=event["RequestId"]
+        )
+        workload_id = response["WorkloadId"]
+        logger.info(f"Created workload: {workload_id}")
+    else:
+        workload_id = event["PhysicalResourceId"]
+
+    if request_type == "Delete":
+        try:
+            wellarchitected_client.delete_workload(
+                WorkloadId=workload_id,
+                ClientRequestToken=event["RequestId"],
+            )
+            logger.info(f"Deleted workload: {workload_id}")
+        except ClientError as e:
+            # The workload may never have been created or was already removed
+            if e.response["Error"]["Code"] not in (
+                "ResourceNotFoundException",
+                "ValidationException",
+            ):
+                raise
+            logger.warning(f"Workload {workload_id} not deleted: {str(e)}")
+
+    return {"PhysicalResourceId": workload_id, "Data": {"WorkloadId": workload_id}}
+
+
+def invoke_functions(event):
+    """
+    Asynchronously invoke the post-deployment Lambda functions, in order.
+    FunctionNames run on every create and update, CreateOnlyFunctionNames on create only.
+    """
+    request_type = event["RequestType"]
+    if request_type == "Delete":
+        return {"PhysicalResourceId": event["PhysicalResourceId"]}
+
+    properties = event["ResourceProperties"]
+    function_names = list(properties.get("FunctionNames", []))
+    if request_type == "Create":
+        function_names.extend(properties.get("CreateOnlyFunctionNames", []))
+
+    for function_name in function_names:
+        lambda_client.invoke(FunctionName=function_name, InvocationType="Event")
+        logger.info(f"Invoked function: {function_name}")
+
+    return {"PhysicalResourceId": event.get("PhysicalResourceId", "DeploymentTrigger")}
+
+
+# Custom resources served by this function, keyed by their Action property
+ACTIONS = {
+    "ingest": start_ingestion,
+    "workload": manage_workload,
+    "invoke": invoke_functions,
+}
+
+
+def handler(event, context):
+    """
+    Custom resource provider handler for deployment-time resources
+    """
+    logger.info(f"Received event: {event}")
+
+    action = event["ResourceProperties"]["Action"]
+    if action not in ACTIONS:
+        raise ValueError(f"Unsupported custom resource action: {action}")
+
+    return ACTIONS[action](event)
@@ -1,17 +1,61 @@
 import csv
+import hashlib
 import json
 import os
 import time
-from datetime import datetime
-from io import StringIO
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from io import BytesIO, StringIO
 
 import boto3
 import requests
+from boto3.exceptions import S3UploadFailedError
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import ClientError
+from requests.adapters import HTTPAdapter
+
+# Primary WA lens PDFs are downloaded and uploaded concurrently. The executor and
+# AWS clients live at module scope so warm invocations reuse threads and connections.
+MAX_WORKERS = 6
+
+# Shared client settings: adaptive retries absorb API throttling and keep-alive
+# sockets are reused across calls
+BOTO_CONFIG = Config(
+    retries={"mode": "adaptive", "max_attempts": 5},
+    tcp_keepalive=True,
+    connect_timeout=3,
+    read_timeout=30,
+)
+
+# Large lens PDFs are sent as parallel multipart uploads, smaller bodies in a single PUT
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=16 * 1024 * 1024,
+    multipart_chunksize=16 * 1024 * 1024,
+    max_concurrency=4,
+)
+
+s3_client = boto3.client(
+    "s3",
+    config=BOTO_CONFIG.merge(
+        Config(max_pool_connections=MAX_WORKERS * TRANSFER_CONFIG.max_concurrency)
+    ),
+)
+wellarchitected_client = boto3.client("wellarchitected", config=BOTO_CONFIG)
+bedrock_agent_client = boto3.client("bedrock-agent", config=BOTO_CONFIG)
+dynamodb = boto3.resource("dynamodb", config=BOTO_CONFIG)
+executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+# Additional lens PDFs are prefetched one at a time on their own worker
+prefetch_executor = ThreadPoolExecutor(max_workers=1)
+
+# All lens PDFs come from docs.aws.amazon.com, so one keep-alive session avoids a
+# fresh TCP + TLS handshake per download
+http_session = requests.Session()
+http_session.mount("https://", HTTPAdapter(pool_maxsize=MAX_WORKERS))
 
 
 def download_file(url):
-    response = requests.get(url)
+    response = http_session.get(url)
     response.raise_for_status()
     return response.content
 
@@ -32,42 +76,108 @@ def create_metadata_json(lens_name, lens_arn, pillar_name=None):
     if lens_name == "Well-Architected Framework" and pillar_name:
         metadata["metadataAttributes"]["pillar"] = pillar_name
 
-    return json.dumps(metadata, indent=4)
+    return json.dumps(metadata, separators=(",", ":"))
 
 
-def upload_to_s3(bucket_name, file_name, file_content, prefix=""):
-    s3_client = boto3.client("s3")
+def get_stored_content_hash(bucket_name, key):
+    """
+    Returns the SHA-256 recorded on an existing S3 object, or None if unavailable
+    """
+    try:
+        response = s3_client.head_object(Bucket=bucket_name, Key=key)
+        return response.get("Metadata", {}).get("sha256")
+    except ClientError:
+        return None
+
+
+def upload_to_s3(bucket_name, file_name, file_content, prefix="", log=print):
     key = f"{prefix}/{file_name}" if prefix else file_name
+    if isinstance(file_content, str):
+        file_content = file_content.encode("utf-8")
+    content_hash = hashlib.sha256(file_content).hexdigest()
     try:
-        s3_client.put_object(Bucket=bucket_name, Key=key, Body=file_content)
-        print(f"File {key} uploaded successfully")
+        # Skip unchanged content so the ingestion job does not re-embed it
+        if get_stored_content_hash(bucket_name, key) == content_hash:
+            log(f"File {key} is unchanged, skipping upload")
+            return True
+        s3_client.upload_fileobj(
+            BytesIO(file_content),
+            bucket_name,
+            key,
+            ExtraArgs={"Metadata": {"sha256": content_hash}},
+            Config=TRANSFER_CONFIG,
+        )
+        log(f"File {key} uploaded successfully")
         return True
-    except ClientError as e:
-        print(f"Error uploading file {key}: {e}")
+    except (ClientError, S3UploadFailedError) as e:
+        log(f"Error uploading file {key}: {e}")
         return False
 
 
 def upload_metadata_file(
-    bucket_name, pdf_file_name, lens_name, lens_arn, pillar_name=None, prefix=""
+    bucket_name,
+    pdf_file_name,
+    lens_name,
+    lens_arn,
+    pillar_name=None,
+    prefix="",
+    log=print,
 ):
     """
     Create and upload a metadata JSON file for a PDF
     """
     metadata_content = create_metadata_json(lens_name, lens_arn, pillar_name)
     metadata_file_name = f"{pdf_file_name}.metadata.json"
-    return upload_to_s3(bucket_name, metadata_file_name, metadata_content, prefix)
+    return upload_to_s3(
+        bucket_name, metadata_file_name, metadata_content, prefix, log=log
+    )
+
+
+def sync_wellarchitected_file(bucket_name, file_data):
+    """
+    Download a primary Well-Architected pillar PDF and upload it with its metadata file.
+    Runs on the executor, so log lines are collected and returned to the caller, which
+    prints them in one piece instead of interleaving output from several threads.
+    """
+    log_lines = []
+    try:
+        pdf_content = download_file(file_data["url"])
+        # Upload to S3 with wellarchitected prefix
+        pdf_ok = upload_to_s3(
+            bucket_name,
+            file_data["pdfName"],
+            pdf_content,
+            prefix="wellarchitected",
+            log=log_lines.append,
+        )
+        # Upload corresponding metadata file
+        metadata_ok = upload_metadata_file(
+            bucket_name,
+            file_data["pdfName"],
+            "Well-Architected Framework",
+            "arn:aws:wellarchitected::aws:lens/wellarchitected",
+            pillar_name=file_data["pillarName"],
+            prefix="wellarchitected",
+            log=log_lines.append,
+        )
+        return pdf_ok and metadata_ok, log_lines
+    except Exception as e:
+        log_lines.append(
+            f"Error processing Well-Architected document {file_data['pdfName']}: {e}"
+        )
+        return False, log_lines
 
 
 def get_lens_review(workload_id, lens_alias):
-    client = boto3.client("wellarchitected")
-    response = client.get_lens_review(WorkloadId=workload_id, LensAlias=lens_alias)
+    response = wellarchitected_client.get_lens_review(
+        WorkloadId=workload_id, LensAlias=lens_alias
+    )
     return response["LensReview"]
 
 
 def upgrade_lens_review(workload_id, lens_alias):
-    client = boto3.client("wellarchitected")
     try:
-        client.upgrade_lens_review(
+        wellarchitected_client.upgrade_lens_review(
             WorkloadId=workload_id,
             LensAlias=lens_alias,
             MilestoneName="string",
@@ -81,9 +191,8 @@ def upgrade_lens_review(workload_id, lens_alias):
 
 
 def associate_lens(workload_id, lens_alias):
-    client = boto3.client("wellarchitected")
     try:
-        client.associate_lenses(
+        wellarchitected_client.associate_lenses(
             WorkloadId=workload_id,
             LensAliases=[lens_alias],
         )
@@ -95,9 +204,8 @@ def associate_lens(workload_id, lens_alias):
 
 
 def disassociate_lens(workload_id, lens_alias):
-    client = boto3.client("wellarchitected")
     try:
-        client.disassociate_lenses(
+        wellarchitected_client.disassociate_lenses(
             WorkloadId=workload_id,
             LensAliases=[lens_alias],
         )
@@ -111,17 +219,18 @@ def disassociate_lens(workload_id, lens_alias):
 
 
 def list_answers(workload_id, lens_alias):
-    client = boto3.client("wellarchitected")
     answers = []
     next_token = None
 
     while True:
         if next_token:
-            response = client.list_answers(
+            response = wellarchitected_client.list_answers(
                 WorkloadId=workload_id, LensAlias=lens_alias, NextToken=next_token
             )
         else:
-            response = client.list_answers(WorkloadId=workload_id, LensAlias=lens_alias)
+            response = wellarchitected_client.list_answers(
+                WorkloadId=workload_id, LensAlias=lens_alias
+            )
 
         answers.extend(response.get("AnswerSummaries", []))
 
@@ -152,7 +261,7 @@ def process_answers(answers, pillar_mapping):
 
 
 def create_json(data):
-    return json.dumps(data, indent=2)
+    return json.dumps(data, separators=(",", ":"))
 
 
 def create_csv(data):
@@ -165,10 +274,9 @@ def create_csv(data):
 
 
 def store_lens_metadata(
-    lens_alias, pdf_url, lens_name, lens_description, pillar_mapping
+    lens_alias, pdf_url, lens_name, lens_description, pillar_mapping, upload_date
 ):
     """Store metadata about processed lens in DynamoDB"""
-    dynamodb = boto3.resource("dynamodb")
     table = dynamodb.Table(os.environ["LENS_METADATA_TABLE"])
 
     try:
@@ -177,7 +285,7 @@ def store_lens_metadata(
                 "lensAlias": lens_alias,
                 "pdfUrl": pdf_url,
                 "lensName": lens_name,
-                "uploadDate": datetime.utcnow().isoformat(),
+                "uploadDate": upload_date,
                 "lensDescription": lens_description,
                 "lensPillars": pillar_mapping,
             }
@@ -189,8 +297,18 @@ def store_lens_metadata(
         return False
 
 
-def process_lens(bucket_name, workload_id, lens_data, is_primary_lens=False):
-    """Process a specific lens - upload PDF, get answers, generate metadata, etc."""
+def process_lens(
+    bucket_name,
+    workload_id,
+    lens_data,
+    processed_at,
+    is_primary_lens=False,
+    pdf_download=None,
+):
+    """Process a specific lens - upload PDF, get answers, generate metadata, etc.
+
+    pdf_download is an optional future resolving to the already-requested PDF content.
+    """
     lens_alias = lens_data.get("lensArn", "")
     s3_prefix = lens_data.get("lensArn", "").split("/")[-1]
     lens_name = lens_data.get("lensName", "")
@@ -204,7 +322,9 @@ def process_lens(bucket_name, workload_id, lens_data, is_primary_lens=False):
     # Step 1: Upload PDF to S3 with appropriate prefix (only for non primary WA lenses)
     try:
         if not is_primary_lens:
-            pdf_content = download_file(lens_url)
+            pdf_content = (
+                pdf_download.result() if pdf_download else download_file(lens_url)
+            )
             if not upload_to_s3(
                 bucket_name, lens_filename, pdf_content, prefix=s3_prefix
             ):
@@ -282,7 +402,12 @@ def process_lens(bucket_name, workload_id, lens_data, is_primary_lens=False):
 
             # Store lens metadata in DynamoDB
             store_lens_metadata(
-                lens_alias, lens_url, lens_name, lens_description, pillar_mapping
+                lens_alias,
+                lens_url,
+                lens_name,
+                lens_description,
+                pillar_mapping,
+                processed_at,
             )
 
         except Exception as e:
@@ -309,6 +434,8 @@ def process_lens(bucket_name, workload_id, lens_data, is_primary_lens=False):
 def handler(event, context):
     bucket_name = os.environ["WA_DOCS_BUCKET_NAME"]
     workload_id = os.environ.get("WORKLOAD_ID")
+    # Single timestamp shared by every lens processed in this run
+    processed_at = datetime.now(timezone.utc).isoformat()
 
     # Define primary Well-Architected lens files
     wellarchitected_files = [
@@ -483,45 +610,59 @@ def handler(event, context):
         "lensDescription": "AWS Well-Architected helps cloud architects build secure, high-performing, resilient, and efficient infrastructure.",
     }
 
-    # Process primary WA lens PDFs
-    for file_data in wellarchitected_files:
-        try:
-            pdf_content = download_file(file_data["url"])
-            # Upload to S3 with wellarchitected prefix
-            upload_to_s3(
-                bucket_name, file_data["pdfName"], pdf_content, prefix="wellarchitected"
-            )
-            # Upload corresponding metadata file
-            upload_metadata_file(
-                bucket_name,
-                file_data["pdfName"],
-                "Well-Architected Framework",
-                "arn:aws:wellarchitected::aws:lens/wellarchitected",
-                pillar_name=file_data["pillarName"],
-                prefix="wellarchitected",
-            )
-        except Exception as e:
-            print(
-                f"Error processing Well-Architected document {file_data['pdfName']}: {e}"
-            )
+    # Process primary WA lens PDFs concurrently (failures are logged and skipped)
+    results = list(
+        executor.map(
+            lambda file_data: sync_wellarchitected_file(bucket_name, file_data),
+            wellarchitected_files,
+        )
+    )
+    log_lines = [line for _, lines in results for line in lines]
+    synced_count = sum(1 for ok, _ in results if ok)
+    log_lines.append(
+        f"Synced {synced_count}/{len(wellarchitected_files)} primary Well-Architected documents"
+    )
+    print("\n".join(log_lines))
 
-    # Now process the wellarchitected lens as a whole
-    process_lens(bucket_name, workload_id, wellarchitected_lens, is_primary_lens=True)
+    # Start downloading the first additional lens PDF while the primary lens is processed
+    next_download = prefetch_executor.submit(download_file, additional_lenses[0]["url"])
 
-    # Process additional lenses
-    for lens in additional_lenses:
+    # Now process the wellarchitected lens as a whole
+    process_lens(
+        bucket_name,
+        workload_id,
+        wellarchitected_lens,
+        processed_at,
+        is_primary_lens=True,
+    )
+
+    # Process additional lenses one at a time (Well-Architected Tool rate limits) while
+    # the next lens PDF downloads in the background, keeping at most two PDFs in memory
+    for index, lens in enumerate(additional_lenses):
         print(f"Processing additional lens: {lens['lensName']}")
 
+        pdf_download = next_download
+        if index + 1 < len(additional_lenses):
+            next_download = prefetch_executor.submit(
+                download_file, additional_lenses[index + 1]["url"]
+            )
+
         # Allow some time between processing each lens to avoid rate limiting
         time.sleep(1)
 
         # Process this lens
-        process_lens(bucket_name, workload_id, lens, is_primary_lens=False)
+        process_lens(
+            bucket_name,
+            workload_id,
+            lens,
+            processed_at,
+            is_primary_lens=False,
+            pdf_download=pdf_download,
+        )
 
     # After all lenses are processed, start the ingestion job
-    bedrock_agent = boto3.client("bedrock-agent")
     try:
-        response = bedrock_agent.start_ingestion_job(
+        response = bedrock_agent_client.start_ingestion_job(
             knowledgeBaseId=os.environ["KNOWLEDGE_BASE_ID"],
             dataSourceId=os.environ["DATA_SOURCE_ID"],
         )
@@ -1,13 +1,29 @@
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
 # Set up logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# Number of userId/fileId groups migrated concurrently in S3
+MAX_WORKERS = 16
+
+# Clients are created once per container with keep-alive sockets and adaptive retries;
+# the S3 pool is sized for the migration workers
+BOTO_CONFIG = Config(
+    retries={"mode": "adaptive", "max_attempts": 10},
+    tcp_keepalive=True,
+)
+dynamodb = boto3.client("dynamodb", config=BOTO_CONFIG)
+s3 = boto3.client(
+    "s3", config=BOTO_CONFIG.merge(Config(max_pool_connections=MAX_WORKERS))
+)
+
 
 def handler(event, context):
     """
@@ -16,10 +32,6 @@ def handler(event, context):
     """
     logger.info(f"Starting migration check with event: {event}")
 
-    # Initialize clients
-    dynamodb = boto3.client("dynamodb")
-    s3 = boto3.client("s3")
-
     # Get environment variables
     analysis_metadata_table = os.environ.get("ANALYSIS_METADATA_TABLE")
     analysis_storage_bucket = os.environ.get("ANALYSIS_STORAGE_BUCKET")
@@ -92,21 +104,8 @@ def update_dynamodb_items(dynamodb, table_name):
     """
     # Get all items from the table
     items = []
-    last_evaluated_key = None
-
-    while True:
-        if last_evaluated_key:
-            response = dynamodb.scan(
-                TableName=table_name, ExclusiveStartKey=last_evaluated_key
-            )
-        else:
-            response = dynamodb.scan(TableName=table_name)
-
-        items.extend(response.get("Items", []))
-        last_evaluated_key = response.get("LastEvaluatedKey")
-
-        if not last_evaluated_key:
-            break
+    for page in dynamodb.get_paginator("scan").paginate(TableName=table_name):
+        items.extend(page.get("Items", []))
 
     logger.info(f"Found {len(items)} items to migrate in DynamoDB")
 
@@ -219,22 +218,8 @@ def migrate_s3_objects(s3, bucket_name):
     """
     # List all objects in the bucket
     all_objects = []
-    continuation_token = None
-
-    while True:
-        if continuation_token:
-            response = s3.list_objects_v2(
-                Bucket=bucket_name, ContinuationToken=continuation_token
-            )
-        else:
-            response = s3.list_objects_v2(Bucket=bucket_name)
-
-        if "Contents" in response:
-            all_objects.extend(response.get("Contents", []))
-
-        if not response.get("IsTruncated"):
-            break
-        continuation_token = response.get("NextContinuationToken")
+    for page in s3.get_paginator("list_objects_v2").paginate(Bucket=bucket_name):
+        all_objects.extend(page.get("Contents", []))
 
     logger.info(f"Found {len(all_objects)} objects in S3 bucket {bucket_name}")
 
@@ -255,74 +240,114 @@ def migrate_s3_objects(s3, bucket_name):
 
             grouped_objects[group_key].append(obj)
 
-    # Process each group
-    for prefix, objects in grouped_objects.items():
-        # Find objects that need to be migrated
-        analysis_results = None
-        iac_templates = None
-        supporting_docs = []
-
-        for obj in objects:
-            key = obj["Key"]
-
-            # Check for old structure paths
-            if key.endswith("/analysis/analysis_results.json"):
-                analysis_results = obj
-            elif (
-                "/iac_templates/generated_template." in key
-                and "/iac_templates/wellarchitected/" not in key
-            ):
-                iac_templates = obj
-            elif (
-                "/supporting_documents/" in key
-                and "/supporting_documents/wellarchitected/" not in key
-            ):
-                # Check if this is not a metadata file and is directly under supporting_documents/
-                parts = key.split("/")
-                if len(parts) >= 4 and parts[-2] == "supporting_documents":
-                    supporting_docs.append(obj)
-
-        # Migrate analysis results
-        if analysis_results:
-            old_key = analysis_results["Key"]
+    # Process each group concurrently; copy/delete calls are independent across groups
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = [
+            executor.submit(migrate_object_group, s3, bucket_name, objects)
+            for objects in grouped_objects.values()
+        ]
+        # Surface the first unexpected error (per-object failures are logged inside)
+        for future in futures:
+            future.result()
+
+
+def migrate_object_group(s3, bucket_name, objects):
+    """
+    Migrates the objects of a single userId/fileId group to the multi-lens structure
+    """
+    # Find objects that need to be migrated
+    analysis_results = None
+    iac_templates = None
+    supporting_docs = []
+
+    for obj in objects:
+        key = obj["Key"]
+
+        # Check for old structure paths
+        if key.endswith("/analysis/analysis_results.json"):
+            analysis_results = obj
+        elif (
+            "/iac_templates/generated_template." in key
+            and "/iac_templates/wellarchitected/" not in key
+        ):
+            iac_templates = obj
+        elif (
+            "/supporting_documents/" in key
+            and "/supporting_documents/wellarchitected/" not in key
+        ):
+            # Check if this is not a metadata file and is directly under supporting_documents/
+            parts = key.split("/")
+            if len(parts) >= 4 and parts[-2] == "supporting_documents":
+                supporting_docs.append(obj)
+
+    # Migrate analysis results
+    if analysis_results:
+        old_key = analysis_results["Key"]
+        new_key = old_key.replace(
+            "/analysis/analysis_results.json",
+            "/analysis/wellarchitected/analysis_results.json",
+        )
+        logger.info(f"Migrating analysis results: {old_key} -> {new_key}")
+
+        try:
+            # Copy to new location
+            s3.copy_object(
+                Bucket=bucket_name,
+                CopySource={"Bucket": bucket_name, "Key": old_key},
+                Key=new_key,
+            )
+
+            # Delete old object
+            s3.delete_object(Bucket=bucket_name, Key=old_key)
+            logger.info(f"Successfully migrated analysis results: {old_key}")
+        except Exception as e:
+            logger.error(f"Error migrating analysis results {old_key}: {str(e)}")
+
+    # Migrate IaC templates
+    if iac_templates:
+        old_key = iac_templates["Key"]
+        # Extract the extension
+        if ".generated_template." in old_key:
+            ext = old_key.split(".generated_template.")[1]
+            new_key = old_key.replace(
+                f".generated_template.{ext}",
+                f".wellarchitected/generated_template.{ext}",
+            )
+        else:
+            ext = old_key.split("generated_template.")[1]
             new_key = old_key.replace(
-                "/analysis/analysis_results.json",
-                "/analysis/wellarchitected/analysis_results.json",
+                f"/iac_templates/generated_template.{ext}",
+                f"/iac_templates/wellarchitected/generated_template.{ext}",
             )
-            logger.info(f"Migrating analysis results: {old_key} -> {new_key}")
 
-            try:
-                # Copy to new location
-                s3.copy_object(
-                    Bucket=bucket_name,
-                    CopySource={"Bucket": bucket_name, "Key": old_key},
-                    Key=new_key,
-                )
+        logger.info(f"Migrating IaC template: {old_key} -> {new_key}")
 
-                # Delete old object
-                s3.delete_object(Bucket=bucket_name, Key=old_key)
-                logger.info(f"Successfully migrated analysis results: {old_key}")
-            except Exception as e:
-                logger.error(f"Error migrating analysis results {old_key}: {str(e)}")
-
-        # Migrate IaC templates
-        if iac_templates:
-            old_key = iac_templates["Key"]
-            # Extract the extension
-            if ".generated_template." in old_key:
-                ext = old_key.split(".generated_template.")[1]
-                new_key = old_key.replace(
-                    f".generated_template.{ext}",
-                    f".wellarchitected/generated_template.{ext}",
-                )
-            else:
-                ext = old_key.split("generated_template.")[1]
-                new_key = old_key.replace(
-                    f"/iac_templates/generated_template.{ext}",
-                    f"/iac_templates/wellarchitected/generated_template.{ext}",
-                )
+        try:
+            # Copy to new location
+            s3.copy_object(
+                Bucket=bucket_name,
+                CopySource={"Bucket": bucket_name, "Key": old_key},
+                Key=new_key,
+            )
 
-            logger.info(f"Migrating IaC template: {old_key} -> {new_key}")
+            # Delete old object
+            s3.delete_object(Bucket=bucket_name, Key=old_key)
+            logger.info(f"Successfully migrated IaC template: {old_key}")
+        except Exception as e:
+            logger.error(f"Error migrating IaC template {old_key}: {str(e)}")
+
+    # Migrate supporting documents
+    for doc in supporting_docs:
+        old_key = doc["Key"]
+        # Extract doc ID from the path
+        parts = old_key.split("/")
+        if len(parts) >= 4:
+            doc_id = parts[-1]
+            new_key = old_key.replace(
+                f"/supporting_documents/{doc_id}",
+                f"/supporting_documents/wellarchitected/{doc_id}",
+            )
+            logger.info(f"Migrating supporting document: {old_key} -> {new_key}")
 
             try:
                 # Copy to new location
@@ -334,45 +359,16 @@ def migrate_s3_objects(s3, bucket_name):
 
                 # Delete old object
                 s3.delete_object(Bucket=bucket_name, Key=old_key)
-                logger.info(f"Successfully migrated IaC template: {old_key}")
+                logger.info(f"Successfully migrated supporting document: {old_key}")
             except Exception as e:
-                logger.error(f"Error migrating IaC template {old_key}: {str(e)}")
-
-        # Migrate supporting documents
-        for doc in supporting_docs:
-            old_key = doc["Key"]
-            # Extract doc ID from the path
-            parts = old_key.split("/")
-            if len(parts) >= 4:
-                doc_id = parts[-1]
-                new_key = old_key.replace(
-                    f"/supporting_documents/{doc_id}",
-                    f"/supporting_documents/wellarchitected/{doc_id}",
-                )
-                logger.info(f"Migrating supporting document: {old_key} -> {new_key}")
-
-                try:
-                    # Copy to new location
-                    s3.copy_object(
-                        Bucket=bucket_name,
-                        CopySource={"Bucket": bucket_name, "Key": old_key},
-                        Key=new_key,
-                    )
-
-                    # Delete old object
-                    s3.delete_object(Bucket=bucket_name, Key=old_key)
-                    logger.info(f"Successfully migrated supporting document: {old_key}")
-                except Exception as e:
-                    logger.error(
-                        f"Error migrating supporting document {old_key}: {str(e)}"
-                    )
+                logger.error(f"Error migrating supporting document {old_key}: {str(e)}")
 
 
 def cleanup_wa_docs_bucket(s3, bucket_name):
     """
     Removes old files from the root of the wafrReferenceDocsBucket
     """
-    files_to_delete = [
+    files_to_delete = {
         "well_architected_best_practices.csv",
         "well_architected_best_practices.json",
         "wellarchitected-cost-optimization-pillar.pdf",
@@ -381,21 +377,35 @@ def cleanup_wa_docs_bucket(s3, bucket_name):
         "wellarchitected-reliability-pillar.pdf",
         "wellarchitected-security-pillar.pdf",
         "wellarchitected-sustainability-pillar.pdf",
-    ]
+    }
 
-    # Check if files exist before deleting
-    for file_name in files_to_delete:
-        try:
-            # Check if file exists
-            s3.head_object(Bucket=bucket_name, Key=file_name)
-
-            # If no exception, file exists - delete it
-            logger.info(f"Deleting {file_name} from {bucket_name}")
-            s3.delete_object(Bucket=bucket_name, Key=file_name)
-        except ClientError as e:
-            if e.response["Error"]["Code"] == "404":
-                logger.info(
-                    f"File {file_name} not found in bucket {bucket_name}, skipping"
-                )
-            else:
-                logger.error(f"Error checking/deleting file {file_name}: {str(e)}")
+    try:
+        # One listing of the bucket root replaces a HEAD request per candidate file
+        existing_files = []
+        paginator = s3.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=bucket_name, Delimiter="/"):
+            existing_files.extend(
+                obj["Key"]
+                for obj in page.get("Contents", [])
+                if obj["Key"] in files_to_delete
+            )
+
+        if not existing_files:
+            logger.info(f"No old files found in the root of bucket {bucket_name}")
+            return
+
+        # Delete all old files in a single batch request
+        logger.info(f"Deleting {existing_files} from {bucket_name}")
+        response = s3.delete_objects(
+            Bucket=bucket_name,
+            Delete={
+                "Objects": [{"Key": file_name} for file_name in existing_files],
+                "Quiet": True,
+            },
+        )
+        for error in response.get("Errors", []):
+            logger.error(
+                f"Error deleting file {error['Key']}: {error.get('Message', error.get('Code'))}"
+            )
+    except ClientError as e:
+        logger.error(f"Error cleaning up old files in {bucket_name}: {str(e)}")
@@ -2,12 +2,19 @@ import logging
 import os
 
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
 # Set up logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# CloudFormation client reused across warm invocations
+cfn_client = boto3.client(
+    "cloudformation",
+    config=Config(retries={"mode": "adaptive", "max_attempts": 10}, tcp_keepalive=True),
+)
+
 
 def handler(event, context):
     """
@@ -37,9 +44,6 @@ def handler(event, context):
                 "body": f"Stack name {stack_name} is not allowed for deletion. Allowed: {allowed_stack_names}",
             }
 
-        # Initialize CloudFormation client
-        cfn_client = boto3.client("cloudformation")
-
         # Delete the stack
         logger.info(f"Deleting stack: {stack_name}")
         cfn_client.delete_stack(StackName=stack_name)
@@ -1,10 +1,14 @@
 """CDK stack for hosting react app in ECS and Fargate"""
 
 import configparser
+import functools
+import hashlib
 import os
 import platform
-import time
-import uuid
+import sys
+from collections.abc import Mapping
+from types import MappingProxyType
+from urllib.parse import urlencode
 
 import aws_cdk as cdk
 import aws_cdk.aws_servicediscovery as servicediscovery
@@ -21,6 +25,7 @@ from aws_cdk import aws_events as events
 from aws_cdk import aws_events_targets as targets
 from aws_cdk import aws_iam as iam
 from aws_cdk import aws_lambda as lambda_
+from aws_cdk import aws_logs as logs
 from aws_cdk import aws_s3 as s3
 from aws_cdk import aws_s3_deployment as s3deploy
 from aws_cdk import aws_secretsmanager as aws_secretsmanager
@@ -29,165 +34,366 @@ from aws_cdk.aws_ecr_assets import DockerImageAsset, Platform
 from cdklabs.generative_ai_cdk_constructs import bedrock
 from constructs import Construct
 
+CONFIG_PATH = "config.ini"
+
+# Host pip cache mounted into the KB synchronizer bundling container so wheels
+# downloaded by one synth are reused when that asset is bundled again
+PIP_CACHE_DIR = os.path.join(os.getcwd(), ".pip-cache")
+
+# Settings coerced to booleans when config.ini is parsed
+BOOLEAN_SETTINGS = ("public_load_balancer", "authentication")
+
+# Fargate and image build settings per CDK host machine architecture
+PLATFORM_MAPPING = {
+    "x86_64": {
+        "fargate_architecture": ecs.CpuArchitecture.X86_64,
+        "build_architecture": Platform.LINUX_AMD64,
+        "build_architecture_argument": "amd64",
+    },
+    "arm64": {
+        "fargate_architecture": ecs.CpuArchitecture.ARM64,
+        "build_architecture": Platform.LINUX_ARM64,
+        "build_architecture_argument": "arm64",
+    },
+    "aarch64": {
+        "fargate_architecture": ecs.CpuArchitecture.ARM64,
+        "build_architecture": Platform.LINUX_ARM64,
+        "build_architecture_argument": "arm64",
+    },
+}
+# Get architecture from platform (depending the machine that runs CDK)
+ARCHITECTURE = PLATFORM_MAPPING[platform.machine()]
+
+# Read-only operations the stack cleanup Lambda needs during stack deletion
+CLEANUP_READ_ACTIONS = (
+    "cloudformation:DescribeStacks",
+    "cloudformation:GetTemplate",
+    "ec2:DescribeInstances",
+    "ec2:DescribeInternetGateways",
+    "ec2:DescribeRouteTables",
+    "ec2:DescribeSecurityGroups",
+    "ec2:DescribeSubnets",
+    "ec2:DescribeVpcs",
+    "iam:GetInstanceProfile",
+    "iam:GetRole",
+    "iam:ListAttachedRolePolicies",
+    "iam:ListRolePolicies",
+    "ssm:DescribeAssociation",
+    "ssm:DescribePatchBaselines",
+    "ssm:GetDocument",
+    "ssm:ListInstanceAssociations",
+    "sts:AssumeRole",
+    "sts:GetCallerIdentity",
+    "tagging:GetResources",
+)
+
+# EC2, SSM, Logs write operations allowed only on resources tagged with the deployment stack
+CLEANUP_TAGGED_WRITE_ACTIONS = (
+    "ec2:DeleteInternetGateway",
+    "ec2:DeleteRoute",
+    "ec2:DeleteRouteTable",
+    "ec2:DeleteSecurityGroup",
+    "ec2:DeleteSubnet",
+    "ec2:DeleteVpc",
+    "ec2:DetachInternetGateway",
+    "ec2:DisassociateRouteTable",
+    "ec2:TerminateInstances",
+    "ssm:GetDeployablePatchSnapshotForInstance",
+    "ssm:PutComplianceItems",
+    "ssm:PutInventory",
+    "ssm:RegisterManagedInstance",
+    "ssm:UpdateInstanceAssociationStatus",
+    "ssm:UpdateInstanceInformation",
+    "logs:CreateLogStream",
+)
+
+# Condition key matching resources created by a given CloudFormation stack
+STACK_TAG_CONDITION_KEY = "aws:ResourceTag/aws:cloudformation:stack-name"
+
+# IAM operations on the deployment stack's roles and instance profiles
+CLEANUP_ROLE_ACTIONS = (
+    "iam:DeleteRole",
+    "iam:DeleteRolePolicy",
+    "iam:DetachRolePolicy",
+)
+CLEANUP_INSTANCE_PROFILE_ACTIONS = (
+    "iam:DeleteInstanceProfile",
+    "iam:RemoveRoleFromInstanceProfile",
+)
+
+
+def _freeze(value):
+    """
+    Recursively wrap dicts in read-only proxies so cached results cannot be mutated
+    """
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    return value
+
+
+@functools.lru_cache(maxsize=4)
+def _load_config(path: str, mtime_ns: int) -> Mapping:
+    """
+    Parse an INI file into nested read-only mappings, coercing boolean settings.
+    Cached per path and modification time so repeated synths reuse the result.
+    """
+    parser = configparser.ConfigParser()
+    parser.read(path)
+    return _freeze(
+        {
+            section: {
+                key: (
+                    parser.getboolean(section, key)
+                    if key in BOOLEAN_SETTINGS
+                    else value
+                )
+                for key, value in parser.items(section)
+            }
+            for section in parser.sections()
+        }
+    )
 
-class WAGenAIStack(Stack):
 
-    def parse_auth_config(self, config: configparser.ConfigParser):
-        auth_config = {
-            "enabled": config.getboolean("settings", "authentication", fallback=False),
-            "authType": config.get("settings", "auth_type", fallback="none"),
-            "certificateArn": config.get("settings", "certificate_arn", fallback=""),
-        }
+@functools.lru_cache(maxsize=4)
+def parse_auth_config(path: str, mtime_ns: int) -> Mapping:
+    settings = _load_config(path, mtime_ns)["settings"]
+    auth_config = {
+        "enabled": settings.get("authentication", False),
+        "authType": sys.intern(settings.get("auth_type", "none")),
+        "certificateArn": settings.get("certificate_arn", ""),
+    }
 
-        if not auth_config["enabled"]:
-            return auth_config
+    if not auth_config["enabled"]:
+        return _freeze(auth_config)
 
-        if not auth_config["certificateArn"]:
-            raise ValueError(
-                "certificate_arn is required when authentication is enabled"
-            )
+    if not auth_config["certificateArn"]:
+        raise ValueError("certificate_arn is required when authentication is enabled")
 
-        if auth_config["authType"] == "new-cognito":
-            auth_config["cognito"] = {
-                "domainPrefix": config.get("settings", "cognito_domain_prefix"),
-                "callbackUrls": config.get("settings", "callback_urls").split(","),
-                "logoutUrl": config.get("settings", "logout_url"),
-            }
-        elif auth_config["authType"] == "existing-cognito":
-            auth_config["cognito"] = {
-                "userPoolArn": config.get("settings", "existing_user_pool_arn"),
-                "clientId": config.get("settings", "existing_user_pool_client_id"),
-                "domain": config.get("settings", "existing_user_pool_domain"),
-                "logoutUrl": config.get("settings", "existing_cognito_logout_url"),
-            }
-        elif auth_config["authType"] == "oidc":
-            auth_config["oidc"] = {
-                "issuer": config.get("settings", "oidc_issuer"),
-                "clientId": config.get("settings", "oidc_client_id"),
-                "authorizationEndpoint": config.get(
-                    "settings", "oidc_authorization_endpoint"
-                ),
-                "tokenEndpoint": config.get("settings", "oidc_token_endpoint"),
-                "userInfoEndpoint": config.get("settings", "oidc_user_info_endpoint"),
-                "logoutUrl": config.get("settings", "oidc_logout_url"),
-            }
+    if auth_config["authType"] == "new-cognito":
+        auth_config["cognito"] = {
+            "domainPrefix": settings["cognito_domain_prefix"],
+            "callbackUrls": tuple(
+                url.strip() for url in settings["callback_urls"].split(",")
+            ),
+            "logoutUrl": settings["logout_url"],
+        }
+    elif auth_config["authType"] == "existing-cognito":
+        auth_config["cognito"] = {
+            "userPoolArn": settings["existing_user_pool_arn"],
+            "clientId": settings["existing_user_pool_client_id"],
+            "domain": settings["existing_user_pool_domain"],
+            "logoutUrl": settings["existing_cognito_logout_url"],
+        }
+    elif auth_config["authType"] == "oidc":
+        auth_config["oidc"] = {
+            "issuer": settings["oidc_issuer"],
+            "clientId": settings["oidc_client_id"],
+            "authorizationEndpoint": settings["oidc_authorization_endpoint"],
+            "tokenEndpoint": settings["oidc_token_endpoint"],
+            "userInfoEndpoint": settings["oidc_user_info_endpoint"],
+            "logoutUrl": settings["oidc_logout_url"],
+        }
+
+    return _freeze(auth_config)
 
-        return auth_config
+
+class WAGenAIStack(Stack):
 
     def create_alb_auth_action(
         self,
-        auth_config: dict,
+        auth_config: Mapping,
         alb_domain: str,
         existing_user_pool=None,
         existing_client=None,
         existing_domain=None,
     ) -> elbv2.ListenerAction:
-        if auth_config["authType"] == "new-cognito":
-            # Use existing user pool, client, and domain if provided
-            if existing_user_pool and existing_client and existing_domain:
-                user_pool = existing_user_pool
-                client = existing_client
-                domain = existing_domain
-            else:
-                # Create user pool
-                user_pool = aws_cognito.UserPool(
-                    self,
-                    "WAAnalyzerUserPool",
-                    user_pool_name="WAAnalyzerUserPool",
-                    self_sign_up_enabled=False,
-                    sign_in_aliases=aws_cognito.SignInAliases(email=True),
-                    standard_attributes=aws_cognito.StandardAttributes(
-                        email=aws_cognito.StandardAttribute(required=True)
-                    ),
-                )
-
-                # Create the domain
-                domain = user_pool.add_domain(
-                    "CognitoDomain",
-                    cognito_domain=aws_cognito.CognitoDomainOptions(
-                        domain_prefix=auth_config["cognito"]["domainPrefix"]
-                    ),
-                )
-
-                # Create the client
-                client = user_pool.add_client(
-                    "WAAnalyzerClient",
-                    generate_secret=True,
-                    o_auth=aws_cognito.OAuthSettings(
-                        flows=aws_cognito.OAuthFlows(authorization_code_grant=True),
-                        scopes=[aws_cognito.OAuthScope.OPENID],
-                        callback_urls=auth_config["cognito"]["callbackUrls"],
-                        logout_urls=auth_config["cognito"]["logoutUrl"],
-                    ),
-                    auth_flows=aws_cognito.AuthFlow(user_password=True, user_srp=True),
-                    prevent_user_existence_errors=True,
-                )
-
-            return actions.AuthenticateCognitoAction(
-                user_pool=user_pool,
-                user_pool_client=client,
-                user_pool_domain=domain,
-                next=elbv2.ListenerAction.forward([self.frontend_target_group]),
-            )
-        elif auth_config["authType"] == "existing-cognito":
-            user_pool = aws_cognito.UserPool.from_user_pool_arn(
-                self, "ImportedUserPool", auth_config["cognito"]["userPoolArn"]
-            )
+        handlers = {
+            "new-cognito": self._alb_new_cognito_action,
+            "existing-cognito": self._alb_existing_cognito_action,
+            "oidc": self._alb_oidc_action,
+        }
+        try:
+            handler = handlers[auth_config["authType"]]
+        except KeyError:
+            raise ValueError(
+                f"Unsupported auth_type {auth_config['authType']!r}, expected one of: "
+                + ", ".join(handlers)
+            ) from None
+        return handler(
+            auth_config,
+            alb_domain,
+            existing_user_pool,
+            existing_client,
+            existing_domain,
+        )
 
-            domain = aws_cognito.UserPoolDomain.from_domain_name(
+    def _alb_new_cognito_action(
+        self,
+        auth_config: Mapping,
+        alb_domain: str,
+        existing_user_pool=None,
+        existing_client=None,
+        existing_domain=None,
+    ) -> elbv2.ListenerAction:
+        # Use existing user pool, client, and domain if provided
+        if existing_user_pool and existing_client and existing_domain:
+            user_pool = existing_user_pool
+            client = existing_client
+            domain = existing_domain
+        else:
+            # Create user pool
+            user_pool = aws_cognito.UserPool(
                 self,
-                "ImportedDomain",
-                user_pool_domain_name=auth_config["cognito"]["domain"],
+                "WAAnalyzerUserPool",
+                user_pool_name="WAAnalyzerUserPool",
+                self_sign_up_enabled=False,
+                sign_in_aliases=aws_cognito.SignInAliases(email=True),
+                standard_attributes=aws_cognito.StandardAttributes(
+                    email=aws_cognito.StandardAttribute(required=True)
+                ),
             )
 
-            user_pool_client = aws_cognito.UserPoolClient.from_user_pool_client_id(
-                self,
-                "ImportedUserPoolClient",
-                user_pool_client_id=auth_config["cognito"]["clientId"],
+            # Create the domain
+            domain = user_pool.add_domain(
+                "CognitoDomain",
+                cognito_domain=aws_cognito.CognitoDomainOptions(
+                    domain_prefix=auth_config["cognito"]["domainPrefix"]
+                ),
             )
 
-            return actions.AuthenticateCognitoAction(
-                user_pool=user_pool,
-                user_pool_client=user_pool_client,
-                user_pool_domain=domain,
-                next=elbv2.ListenerAction.forward([self.frontend_target_group]),
+            # Create the client
+            client = user_pool.add_client(
+                "WAAnalyzerClient",
+                generate_secret=True,
+                o_auth=aws_cognito.OAuthSettings(
+                    flows=aws_cognito.OAuthFlows(authorization_code_grant=True),
+                    scopes=[aws_cognito.OAuthScope.OPENID],
+                    callback_urls=list(auth_config["cognito"]["callbackUrls"]),
+                    logout_urls=auth_config["cognito"]["logoutUrl"],
+                ),
+                auth_flows=aws_cognito.AuthFlow(user_password=True, user_srp=True),
+                prevent_user_existence_errors=True,
             )
-        elif auth_config["authType"] == "oidc":
-            # OIDC configuration
 
-            # Retrieve existing secret "WAIaCAnalyzerOIDCSecret" (See README for more details about creating this secret prior deployment)
-            oidc_secret = aws_secretsmanager.Secret.from_secret_name_v2(
-                self, "OidcClientSecret", "WAIaCAnalyzerOIDCSecret"
-            )
+        return actions.AuthenticateCognitoAction(
+            user_pool=user_pool,
+            user_pool_client=client,
+            user_pool_domain=domain,
+            next=elbv2.ListenerAction.forward([self.frontend_target_group]),
+        )
 
-            return elbv2.ListenerAction.authenticate_oidc(
-                authorization_endpoint=auth_config["oidc"]["authorizationEndpoint"],
-                client_id=auth_config["oidc"]["clientId"],
-                client_secret=oidc_secret.secret_value,
-                issuer=auth_config["oidc"]["issuer"],
-                token_endpoint=auth_config["oidc"]["tokenEndpoint"],
-                user_info_endpoint=auth_config["oidc"]["userInfoEndpoint"],
-                next=elbv2.ListenerAction.forward([self.frontend_target_group]),
-            )
+    def _alb_existing_cognito_action(
+        self,
+        auth_config: Mapping,
+        alb_domain: str,
+        existing_user_pool=None,
+        existing_client=None,
+        existing_domain=None,
+    ) -> elbv2.ListenerAction:
+        user_pool = aws_cognito.UserPool.from_user_pool_arn(
+            self, "ImportedUserPool", auth_config["cognito"]["userPoolArn"]
+        )
+
+        domain = aws_cognito.UserPoolDomain.from_domain_name(
+            self,
+            "ImportedDomain",
+            user_pool_domain_name=auth_config["cognito"]["domain"],
+        )
+
+        user_pool_client = aws_cognito.UserPoolClient.from_user_pool_client_id(
+            self,
+            "ImportedUserPoolClient",
+            user_pool_client_id=auth_config["cognito"]["clientId"],
+        )
+
+        return actions.AuthenticateCognitoAction(
+            user_pool=user_pool,
+            user_pool_client=user_pool_client,
+            user_pool_domain=domain,
+            next=elbv2.ListenerAction.forward([self.frontend_target_group]),
+        )
+
+    def _alb_oidc_action(
+        self,
+        auth_config: Mapping,
+        alb_domain: str,
+        existing_user_pool=None,
+        existing_client=None,
+        existing_domain=None,
+    ) -> elbv2.ListenerAction:
+        # OIDC configuration
+
+        # Retrieve existing secret "WAIaCAnalyzerOIDCSecret" (See README for more details about creating this secret prior deployment)
+        oidc_secret = aws_secretsmanager.Secret.from_secret_name_v2(
+            self, "OidcClientSecret", "WAIaCAnalyzerOIDCSecret"
+        )
+
+        return elbv2.ListenerAction.authenticate_oidc(
+            authorization_endpoint=auth_config["oidc"]["authorizationEndpoint"],
+            client_id=auth_config["oidc"]["clientId"],
+            client_secret=oidc_secret.secret_value,
+            issuer=auth_config["oidc"]["issuer"],
+            token_endpoint=auth_config["oidc"]["tokenEndpoint"],
+            user_info_endpoint=auth_config["oidc"]["userInfoEndpoint"],
+            next=elbv2.ListenerAction.forward([self.frontend_target_group]),
+        )
 
     def create_stack_cleanup_resources(self):
         """
         Create resources for automatic stack cleanup via EventBridge and Lambda
         """
-        # Get deployment stack name from environment
-        deployment_stack_name = os.environ.get("DEPLOYMENT_STACK_NAME", "")
+        deployment_stack_name = self._deployment_stack_name
+        region, account = self.region, self.account
 
-        # Validate that deployment_stack_name is provided
-        if not deployment_stack_name:
-            raise ValueError(
-                "DEPLOYMENT_STACK_NAME environment variable must be provided"
-            )
+        # ARNs of the deployment stack and of the IAM resources it owns
+        stack_arn = (
+            f"arn:aws:cloudformation:{region}:{account}:stack/{deployment_stack_name}/*"
+        )
+        role_arn = f"arn:aws:iam::{account}:role/{deployment_stack_name}*"
+        instance_profile_arn = (
+            f"arn:aws:iam::{account}:instance-profile/{deployment_stack_name}*"
+        )
+
+        # EC2, SSM, Logs write operations - With resource tag condition for specific stack
+        tag_conditions = {
+            "StringEquals": {STACK_TAG_CONDITION_KEY: [deployment_stack_name]}
+        }
 
         # Create Lambda execution role
         lambda_role = iam.Role(
             self,
             "StackCleanupLambdaRole",
             assumed_by=iam.ServicePrincipal("lambda.amazonaws.com"),
+            inline_policies={
+                "StackCleanupPolicy": iam.PolicyDocument(
+                    statements=[
+                        # CloudFormation permissions to delete the specific stack
+                        iam.PolicyStatement(
+                            actions=["cloudformation:DeleteStack"],
+                            resources=[stack_arn],
+                        ),
+                        # Read-only operations needed during stack deletion
+                        iam.PolicyStatement(
+                            actions=list(CLEANUP_READ_ACTIONS),
+                            resources=["*"],
+                        ),
+                        iam.PolicyStatement(
+                            actions=list(CLEANUP_TAGGED_WRITE_ACTIONS),
+                            resources=["*"],
+                            conditions=tag_conditions,
+                        ),
+                        # IAM permissions for the specific stack resources
+                        iam.PolicyStatement(
+                            actions=list(CLEANUP_ROLE_ACTIONS),
+                            resources=[role_arn],
+                        ),
+                        iam.PolicyStatement(
+                            actions=list(CLEANUP_INSTANCE_PROFILE_ACTIONS),
+                            resources=[instance_profile_arn],
+                        ),
+                    ]
+                )
+            },
         )
 
         # Add CloudWatch Logs permissions
@@ -197,118 +403,15 @@ class WAGenAIStack(Stack):
             )
         )
 
-        # Add CloudFormation permissions to delete the specific stack
-        lambda_role.add_to_policy(
-            iam.PolicyStatement(
-                actions=["cloudformation:DeleteStack"],
-                resources=[
-                    f"arn:aws:cloudformation:{self.region}:{self.account}:stack/{deployment_stack_name}/*",
-                ],
-            )
-        )
-
-        # Read-only operations needed during stack deletion
-        lambda_role.add_to_policy(
-            iam.PolicyStatement(
-                actions=[
-                    "cloudformation:DescribeStacks",
-                    "cloudformation:GetTemplate",
-                    "ec2:DescribeInstances",
-                    "ec2:DescribeInternetGateways",
-                    "ec2:DescribeRouteTables",
-                    "ec2:DescribeSecurityGroups",
-                    "ec2:DescribeSubnets",
-                    "ec2:DescribeVpcs",
-                    "iam:GetInstanceProfile",
-                    "iam:GetRole",
-                    "iam:ListAttachedRolePolicies",
-                    "iam:ListRolePolicies",
-                    "ssm:DescribeAssociation",
-                    "ssm:DescribePatchBaselines",
-                    "ssm:GetDocument",
-                    "ssm:ListInstanceAssociations",
-                    "sts:AssumeRole",
-                    "sts:GetCallerIdentity",
-                    "tagging:GetResources",
-                ],
-                resources=["*"],
-            )
-        )
-
-        # EC2, SSM, Logs write operations - With resource tag condition for specific stack
-        tag_conditions = {
-            "StringEquals": {
-                "aws:ResourceTag/aws:cloudformation:stack-name": [deployment_stack_name]
-            }
-        }
-
-        lambda_role.add_to_policy(
-            iam.PolicyStatement(
-                actions=[
-                    "ec2:DeleteInternetGateway",
-                    "ec2:DeleteRoute",
-                    "ec2:DeleteRouteTable",
-                    "ec2:DeleteSecurityGroup",
-                    "ec2:DeleteSubnet",
-                    "ec2:DeleteVpc",
-                    "ec2:DetachInternetGateway",
-                    "ec2:DisassociateRouteTable",
-                    "ec2:TerminateInstances",
-                    "ssm:GetDeployablePatchSnapshotForInstance",
-                    "ssm:PutComplianceItems",
-                    "ssm:PutInventory",
-                    "ssm:RegisterManagedInstance",
-                    "ssm:UpdateInstanceAssociationStatus",
-                    "ssm:UpdateInstanceInformation",
-                    "logs:CreateLogStream",
-                ],
-                resources=["*"],
-                conditions=tag_conditions,
-            )
-        )
-
-        # IAM permissions for the specific stack resources
-        lambda_role.add_to_policy(
-            iam.PolicyStatement(
-                actions=[
-                    "iam:DeleteRole",
-                    "iam:DeleteRolePolicy",
-                    "iam:DetachRolePolicy",
-                ],
-                resources=[
-                    f"arn:aws:iam::{self.account}:role/{deployment_stack_name}*"
-                ],
-            )
-        )
-
-        lambda_role.add_to_policy(
-            iam.PolicyStatement(
-                actions=[
-                    "iam:DeleteInstanceProfile",
-                    "iam:RemoveRoleFromInstanceProfile",
-                ],
-                resources=[
-                    f"arn:aws:iam::{self.account}:instance-profile/{deployment_stack_name}*"
-                ],
-            )
-        )
-
         # Create Lambda function
         cleanup_lambda = lambda_.Function(
             self,
             "StackCleanupLambda",
             runtime=lambda_.Runtime.PYTHON_3_12,
             handler="stack_cleanup.handler",
+            # Only needs the boto3 shipped with the runtime, so no bundling container
             code=lambda_.Code.from_asset(
-                "ecs_fargate_app/lambda_stack_cleanup",
-                bundling=cdk.BundlingOptions(
-                    image=lambda_.Runtime.PYTHON_3_12.bundling_image,
-                    command=[
-                        "bash",
-                        "-c",
-                        "pip install --no-cache -r requirements.txt -t /asset-output && cp -au . /asset-output",
-                    ],
-                ),
+                "ecs_fargate_app/lambda_stack_cleanup", exclude=["__pycache__"]
             ),
             timeout=Duration.minutes(10),
             role=lambda_role,
@@ -335,18 +438,27 @@ class WAGenAIStack(Stack):
     def __init__(self, scope: Construct, construct_id: str, **kwarg) -> None:
         super().__init__(scope, construct_id, **kwarg)
 
-        # Read config.ini
-        config = configparser.ConfigParser()
-        config.read("config.ini")
-        model_id = config["settings"]["model_id"]
-        public_lb = config["settings"].getboolean("public_load_balancer", False)
-
         # Check if auto-cleanup is enabled (from environment variable set by deploy script)
-        auto_cleanup = os.environ.get("AUTO_CLEANUP", "false").lower() == "true"
-        deployment_stack_name = os.environ.get("DEPLOYMENT_STACK_NAME", "")
+        self._auto_cleanup = os.environ.get("AUTO_CLEANUP", "false").lower() == "true"
+        self._deployment_stack_name = os.environ.get("DEPLOYMENT_STACK_NAME", "")
+
+        # Validate that deployment_stack_name is provided when cleanup resources will be created
+        if self._auto_cleanup and not self._deployment_stack_name:
+            raise ValueError(
+                "DEPLOYMENT_STACK_NAME environment variable must be provided"
+            )
+
+        # Docker would otherwise create the bind-mounted pip cache owned by root
+        os.makedirs(PIP_CACHE_DIR, exist_ok=True)
+
+        # Read config.ini (parsed once per file modification time)
+        config_mtime = os.stat(CONFIG_PATH).st_mtime_ns
+        cfg = _load_config(CONFIG_PATH, config_mtime)
+        model_id = cfg["settings"]["model_id"]
+        public_lb = cfg["settings"].get("public_load_balancer", False)
 
         # Parse authentication config
-        auth_config = self.parse_auth_config(config)
+        auth_config = parse_auth_config(CONFIG_PATH, config_mtime)
 
         # Create sign out URL based on auth type
         sign_out_url = ""
@@ -354,37 +466,20 @@ class WAGenAIStack(Stack):
             if auth_config["authType"] == "existing-cognito":
                 # For Cognito, construct base sign out URL
                 cognito_domain = auth_config["cognito"]["domain"]
-                sign_out_url = (
-                    f"https://{cognito_domain}/logout?"
-                    f"client_id={auth_config['cognito']['clientId']}&"
-                    f"logout_uri={auth_config['cognito']['logoutUrl']}&"
-                    "response_type=code"
+                query = urlencode(
+                    {
+                        "client_id": auth_config["cognito"]["clientId"],
+                        "logout_uri": auth_config["cognito"]["logoutUrl"],
+                        "response_type": "code",
+                    }
                 )
+                sign_out_url = f"https://{cognito_domain}/logout?{query}"
             elif auth_config["authType"] == "oidc":
                 # For OIDC, use the configured sign out endpoint if available
                 sign_out_url = auth_config["oidc"]["logoutUrl"]
 
-        random_id = str(uuid.uuid4())[:8]  # First 8 characters of a UUID
-
-        platform_mapping = {
-            "x86_64": {
-                "fargate_architecture": ecs.CpuArchitecture.X86_64,
-                "build_architecture": Platform.LINUX_AMD64,
-                "build_architecture_argument": "amd64",
-            },
-            "arm64": {
-                "fargate_architecture": ecs.CpuArchitecture.ARM64,
-                "build_architecture": Platform.LINUX_ARM64,
-                "build_architecture_argument": "arm64",
-            },
-            "aarch64": {
-                "fargate_architecture": ecs.CpuArchitecture.ARM64,
-                "build_architecture": Platform.LINUX_ARM64,
-                "build_architecture_argument": "arm64",
-            },
-        }
-        # Get architecture from platform (depending the machine that runs CDK)
-        architecture = platform_mapping[platform.machine()]
+        # Stable 8-character suffix derived from the stack id so repeated synths produce the same template
+        random_id = hashlib.blake2s(construct_id.encode(), digest_size=4).hexdigest()
 
         # Creates Bedrock KB using the generative_ai_cdk_constructs
         kb = bedrock.KnowledgeBase(
@@ -453,9 +548,21 @@ class WAGenAIStack(Stack):
         wafrReferenceDeploy = s3deploy.BucketDeployment(
             self,
             "uploadwellarchitecteddocs",
-            sources=[s3deploy.Source.asset("ecs_fargate_app/well_architected_docs")],
+            # Static docs need no bundling; keep OS clutter out of the zip and its hash
+            sources=[
+                s3deploy.Source.asset(
+                    "ecs_fargate_app/well_architected_docs",
+                    asset_hash_type=cdk.AssetHashType.SOURCE,
+                    exclude=[".DS_Store", "*.md"],
+                )
+            ],
             destination_bucket=wafrReferenceDocsBucket,
             destination_key_prefix="wellarchitected",
+            # More memory gives the upload Lambda more CPU and network throughput
+            memory_limit=1024,
+            ephemeral_storage_size=cdk.Size.mebibytes(1024),
+            # Keep objects the KB synchronizer adds under the same prefix (e.g. .metadata.json files)
+            prune=False,
         )
 
         WA_DOCS_BUCKET_NAME = wafrReferenceDocsBucket.bucket_name
@@ -472,25 +579,51 @@ class WAGenAIStack(Stack):
             ),
         )
 
-        # Data Ingestion Params
-        dataSourceIngestionParams = {
-            "dataSourceId": kbDataSource.data_source_id,
-            "knowledgeBaseId": KB_ID,
-        }
+        # Lambda-backed provider for the deployment-time custom resources below
+        deployment_resources_lambda = lambda_.Function(
+            self,
+            "DeploymentResourcesLambda",
+            runtime=lambda_.Runtime.PYTHON_3_12,
+            handler="deployment_resources.handler",
+            code=lambda_.Code.from_asset("ecs_fargate_app/lambda_deployment_resources"),
+            timeout=Duration.minutes(1),
+            initial_policy=[
+                iam.PolicyStatement(
+                    effect=iam.Effect.ALLOW,
+                    actions=["bedrock:StartIngestionJob"],
+                    resources=[kb.knowledge_base_arn],
+                ),
+                iam.PolicyStatement(
+                    effect=iam.Effect.ALLOW,
+                    actions=["wellarchitected:CreateWorkload"],
+                    resources=["*"],
+                ),
+                iam.PolicyStatement(
+                    effect=iam.Effect.ALLOW,
+                    actions=["wellarchitected:DeleteWorkload"],
+                    resources=[
+                        f"arn:aws:wellarchitected:{self.region}:{self.account}:workload/*"
+                    ],
+                ),
+            ],
+        )
+
+        deployment_resources_provider = cr.Provider(
+            self,
+            "DeploymentResourcesProvider",
+            on_event_handler=deployment_resources_lambda,
+        )
 
-        # Define a custom resource to make an AwsSdk startIngestionJob call
-        ingestion_job_cr = cr.AwsCustomResource(
+        # Start the initial Knowledge Base ingestion job
+        ingestion_job_cr = cdk.CustomResource(
             self,
             "IngestionCustomResource",
-            on_create=cr.AwsSdkCall(
-                service="bedrock-agent",
-                action="startIngestionJob",
-                parameters=dataSourceIngestionParams,
-                physical_resource_id=cr.PhysicalResourceId.of("Parameter.ARN"),
-            ),
-            policy=cr.AwsCustomResourcePolicy.from_sdk_calls(
-                resources=cr.AwsCustomResourcePolicy.ANY_RESOURCE
-            ),
+            service_token=deployment_resources_provider.service_token,
+            properties={
+                "Action": "ingest",
+                "KnowledgeBaseId": KB_ID,
+                "DataSourceId": kbDataSource.data_source_id,
+            },
         )
 
         # Params for the test Well-Architected Workload
@@ -502,39 +635,13 @@ class WAGenAIStack(Stack):
             "Environment": "PREPRODUCTION",
             "AwsRegions": [test_workload_region],
             "Lenses": ["wellarchitected"],
-            "ClientRequestToken": random_id,
         }
         # Create a test Well-Architected Workload
-        workload_cr = cr.AwsCustomResource(
+        workload_cr = cdk.CustomResource(
             self,
             "TestWorkload",
-            on_create=cr.AwsSdkCall(
-                service="wellarchitected",
-                action="createWorkload",
-                parameters=waToolWorkloadParams,
-                physical_resource_id=cr.PhysicalResourceId.from_response("WorkloadId"),
-                output_paths=["WorkloadId"],
-            ),
-            on_update=cr.AwsSdkCall(
-                service="wellarchitected",
-                action="listLensReviews",
-                parameters={
-                    "WorkloadId": cr.PhysicalResourceIdReference(),
-                },
-                physical_resource_id=cr.PhysicalResourceId.from_response("WorkloadId"),
-                output_paths=["WorkloadId"],
-            ),
-            on_delete=cr.AwsSdkCall(
-                service="wellarchitected",
-                action="deleteWorkload",
-                parameters={
-                    "WorkloadId": cr.PhysicalResourceIdReference(),
-                    "ClientRequestToken": random_id,
-                },
-            ),
-            policy=cr.AwsCustomResourcePolicy.from_sdk_calls(
-                resources=cr.AwsCustomResourcePolicy.ANY_RESOURCE
-            ),
+            service_token=deployment_resources_provider.service_token,
+            properties={"Action": "workload", "Workload": waToolWorkloadParams},
         )
 
         # Lambda function to refresh and sync Knowledge Base with data source
@@ -550,55 +657,62 @@ class WAGenAIStack(Stack):
                     command=[
                         "bash",
                         "-c",
-                        "pip install --no-cache -r requirements.txt -t /asset-output && cp -au . /asset-output",
+                        "pip install -r requirements.txt -t /asset-output && cp -au . /asset-output",
                     ],
+                    volumes=[
+                        cdk.DockerVolume(
+                            host_path=PIP_CACHE_DIR, container_path="/tmp/pip-cache"
+                        )
+                    ],
+                    environment={"PIP_CACHE_DIR": "/tmp/pip-cache"},
                 ),
+                # Source hashing lets CDK skip re-bundling when the asset is already staged
+                asset_hash_type=cdk.AssetHashType.SOURCE,
+                exclude=["__pycache__"],
             ),
             environment={
                 "KNOWLEDGE_BASE_ID": KB_ID,
                 "DATA_SOURCE_ID": kbDataSource.data_source_id,
                 "WA_DOCS_BUCKET_NAME": wafrReferenceDocsBucket.bucket_name,
-                "WORKLOAD_ID": workload_cr.get_response_field("WorkloadId"),
+                "WORKLOAD_ID": workload_cr.get_att_string("WorkloadId"),
                 "LENS_METADATA_TABLE": lens_metadata_table.table_name,
             },
             timeout=Duration.minutes(15),
-        )
-
-        # Grant permissions to the KB synchronizer Lambda
-        kb_lambda_synchronizer.add_to_role_policy(
-            iam.PolicyStatement(
-                actions=["bedrock:StartIngestionJob"],
-                resources=[
-                    f"arn:aws:bedrock:{self.region}:{self.account}:knowledge-base/{KB_ID}"
-                ],
-            )
-        )
-        kb_lambda_synchronizer.add_to_role_policy(
-            iam.PolicyStatement(
-                actions=[
-                    "wellarchitected:GetLensReview",
-                    "wellarchitected:ListAnswers",
-                    "wellarchitected:UpgradeLensReview",
-                    "wellarchitected:AssociateLenses",
-                    "wellarchitected:DisassociateLenses",
-                ],
-                resources=["*"],
-            )
+            # Up to six pillar PDFs plus the lens prefetch are held in memory at once,
+            # along with multipart upload buffers, so the 128MB default is too small
+            memory_size=1024,
+            initial_policy=[
+                iam.PolicyStatement(
+                    actions=["bedrock:StartIngestionJob"],
+                    resources=[
+                        f"arn:aws:bedrock:{self.region}:{self.account}:knowledge-base/{KB_ID}"
+                    ],
+                ),
+                iam.PolicyStatement(
+                    actions=[
+                        "wellarchitected:GetLensReview",
+                        "wellarchitected:ListAnswers",
+                        "wellarchitected:UpgradeLensReview",
+                        "wellarchitected:AssociateLenses",
+                        "wellarchitected:DisassociateLenses",
+                    ],
+                    resources=["*"],
+                ),
+            ],
         )
 
         # Grant Lambda access to the lens metadata table
         lens_metadata_table.grant_read_write_data(kb_lambda_synchronizer)
 
-        # Grant Lambda access to the WA docs bucket
+        # Grant Lambda access to the WA docs bucket (read is needed to skip unchanged uploads)
         wafrReferenceDocsBucket.grant_put(kb_lambda_synchronizer)
+        wafrReferenceDocsBucket.grant_read(kb_lambda_synchronizer)
 
         # Create EventBridge rule to trigger KbLambdaSynchronizer weekly on Mondays
         events.Rule(
             self,
             "WeeklyIngestionRule",
-            schedule=events.Schedule.cron(
-                minute="0", hour="0", month="*", week_day="2", year="*"
-            ),
+            schedule=events.Schedule.expression("cron(0 0 ? * 2 *)"),
             targets=[targets.LambdaFunction(kb_lambda_synchronizer)],
         )
 
@@ -607,10 +721,10 @@ class WAGenAIStack(Stack):
             "FrontendImage",
             directory="ecs_fargate_app",
             file="finch/frontend.Dockerfile",
-            platform=architecture["build_architecture"],
+            platform=ARCHITECTURE["build_architecture"],
             build_args={
                 "BUILDKIT_INLINE_CACHE": "1",
-                "PLATFORM": architecture["build_architecture_argument"],
+                "PLATFORM": ARCHITECTURE["build_architecture_argument"],
             },
         )
 
@@ -619,10 +733,10 @@ class WAGenAIStack(Stack):
             "BackendImage",
             directory="ecs_fargate_app",
             file="finch/backend.Dockerfile",
-            platform=architecture["build_architecture"],
+            platform=ARCHITECTURE["build_architecture"],
             build_args={
                 "BUILDKIT_INLINE_CACHE": "1",
-                "PLATFORM": architecture["build_architecture_argument"],
+                "PLATFORM": ARCHITECTURE["build_architecture_argument"],
             },
         )
 
@@ -631,155 +745,161 @@ class WAGenAIStack(Stack):
             self,
             "AppExecuteRole",
             assumed_by=iam.ServicePrincipal("ecs-tasks.amazonaws.com"),
-        )
-        app_execute_role.add_to_policy(
-            iam.PolicyStatement(
-                actions=[
-                    "ecr:GetAuthorizationToken",
-                    "ecr:BatchCheckLayerAvailability",
-                    "ecr:GetDownloadUrlForLayer",
-                    "ecr:BatchGetImage",
-                    "logs:CreateLogStream",
-                    "logs:PutLogEvents",
-                ],
-                resources=["*"],
-            )
-        )
-
-        # Add policy statements to the IAM role
-        app_execute_role.add_to_policy(
-            iam.PolicyStatement(
-                actions=[
-                    "wellarchitected:GetLensReview",
-                    "wellarchitected:ListAnswers",
-                    "wellarchitected:GetWorkload",
-                    "wellarchitected:UpdateAnswer",
-                    "wellarchitected:CreateMilestone",
-                    "wellarchitected:GetLensReviewReport",
-                    "wellarchitected:AssociateLenses",
-                    "wellarchitected:ListWorkloads",
-                ],
-                resources=["*"],
-            )
-        )
-        app_execute_role.add_to_policy(
-            iam.PolicyStatement(
-                actions=[
-                    "wellarchitected:CreateWorkload",
-                    "wellarchitected:TagResource",
-                ],
-                resources=["*"],
-                conditions={
-                    "StringLike": {
-                        "aws:RequestTag/WorkloadName": [
-                            "DO_NOT_DELETE_temp_IaCAnalyzer_*",
-                            "IaCAnalyzer_*",
-                        ]
-                    }
-                },
-            )
-        )
-        app_execute_role.add_to_policy(
-            iam.PolicyStatement(
-                actions=[
-                    "wellarchitected:DeleteWorkload",
-                ],
-                resources=["*"],
-                conditions={
-                    "StringLike": {
-                        "aws:ResourceTag/WorkloadName": [
-                            "DO_NOT_DELETE_temp_IaCAnalyzer_*",
-                            "IaCAnalyzer_*",
-                        ]
-                    }
-                },
-            )
-        )
-        app_execute_role.add_to_policy(
-            iam.PolicyStatement(actions=["bedrock:InvokeModel"], resources=["*"])
-        )
-        app_execute_role.add_to_policy(
-            iam.PolicyStatement(
-                actions=["s3:GetObject", "s3:ListBucket"],
-                resources=[
-                    f"arn:aws:s3:::{WA_DOCS_BUCKET_NAME}",
-                    f"arn:aws:s3:::{WA_DOCS_BUCKET_NAME}/*",
-                ],
-            )
+            inline_policies={
+                "AppPolicy": iam.PolicyDocument(
+                    statements=[
+                        iam.PolicyStatement(
+                            actions=[
+                                "ecr:GetAuthorizationToken",
+                                "ecr:BatchCheckLayerAvailability",
+                                "ecr:GetDownloadUrlForLayer",
+                                "ecr:BatchGetImage",
+                                "logs:CreateLogStream",
+                                "logs:PutLogEvents",
+                            ],
+                            resources=["*"],
+                        ),
+                        iam.PolicyStatement(
+                            actions=[
+                                "wellarchitected:GetLensReview",
+                                "wellarchitected:ListAnswers",
+                                "wellarchitected:GetWorkload",
+                                "wellarchitected:UpdateAnswer",
+                                "wellarchitected:CreateMilestone",
+                                "wellarchitected:GetLensReviewReport",
+                                "wellarchitected:AssociateLenses",
+                                "wellarchitected:ListWorkloads",
+                            ],
+                            resources=["*"],
+                        ),
+                        iam.PolicyStatement(
+                            actions=[
+                                "wellarchitected:CreateWorkload",
+                                "wellarchitected:TagResource",
+                            ],
+                            resources=["*"],
+                            conditions={
+                                "StringLike": {
+                                    "aws:RequestTag/WorkloadName": [
+                                        "DO_NOT_DELETE_temp_IaCAnalyzer_*",
+                                        "IaCAnalyzer_*",
+                                    ]
+                                }
+                            },
+                        ),
+                        iam.PolicyStatement(
+                            actions=[
+                                "wellarchitected:DeleteWorkload",
+                            ],
+                            resources=["*"],
+                            conditions={
+                                "StringLike": {
+                                    "aws:ResourceTag/WorkloadName": [
+                                        "DO_NOT_DELETE_temp_IaCAnalyzer_*",
+                                        "IaCAnalyzer_*",
+                                    ]
+                                }
+                            },
+                        ),
+                        iam.PolicyStatement(
+                            actions=["bedrock:InvokeModel"], resources=["*"]
+                        ),
+                        iam.PolicyStatement(
+                            actions=["s3:GetObject", "s3:ListBucket"],
+                            resources=[
+                                f"arn:aws:s3:::{WA_DOCS_BUCKET_NAME}",
+                                f"arn:aws:s3:::{WA_DOCS_BUCKET_NAME}/*",
+                            ],
+                        ),
+                        # Adding DDB and S3 data store bucket permission for app_execute_role
+                        iam.PolicyStatement(
+                            actions=[
+                                "s3:PutObject",
+                                "s3:GetObject",
+                                "s3:DeleteObject",
+                                "s3:ListBucket",
+                            ],
+                            resources=[
+                                analysis_storage_bucket.bucket_arn,
+                                f"{analysis_storage_bucket.bucket_arn}/*",
+                            ],
+                        ),
+                        iam.PolicyStatement(
+                            actions=[
+                                "dynamodb:PutItem",
+                                "dynamodb:GetItem",
+                                "dynamodb:DeleteItem",
+                                "dynamodb:Query",
+                                "dynamodb:UpdateItem",
+                            ],
+                            resources=[
+                                analysis_metadata_table.table_arn,
+                                f"{analysis_metadata_table.table_arn}/index/*",
+                            ],
+                        ),
+                        # Grant permissions to scan the lens metadata table
+                        iam.PolicyStatement(
+                            actions=[
+                                "dynamodb:Scan",
+                                "dynamodb:GetItem",
+                                "dynamodb:Query",
+                            ],
+                            resources=[
+                                lens_metadata_table.table_arn,
+                                f"{lens_metadata_table.table_arn}/index/*",
+                            ],
+                        ),
+                    ]
+                )
+            },
         )
         app_execute_role.add_managed_policy(
             iam.ManagedPolicy.from_aws_managed_policy_name("AmazonBedrockFullAccess")
         )
 
-        # Adding DDB and S3 data store bucket permission for app_execute_role
-        app_execute_role.add_to_policy(
-            iam.PolicyStatement(
-                actions=[
-                    "s3:PutObject",
-                    "s3:GetObject",
-                    "s3:DeleteObject",
-                    "s3:ListBucket",
-                ],
-                resources=[
-                    analysis_storage_bucket.bucket_arn,
-                    f"{analysis_storage_bucket.bucket_arn}/*",
-                ],
-            )
-        )
-
-        app_execute_role.add_to_policy(
-            iam.PolicyStatement(
-                actions=[
-                    "dynamodb:PutItem",
-                    "dynamodb:GetItem",
-                    "dynamodb:DeleteItem",
-                    "dynamodb:Query",
-                    "dynamodb:UpdateItem",
-                ],
-                resources=[
-                    analysis_metadata_table.table_arn,
-                    f"{analysis_metadata_table.table_arn}/index/*",
-                ],
-            )
-        )
-
-        # Grant permissions to scan the lens metadata table
-        app_execute_role.add_to_policy(
-            iam.PolicyStatement(
-                actions=[
-                    "dynamodb:Scan",
-                    "dynamodb:GetItem",
-                    "dynamodb:Query",
-                ],
-                resources=[
-                    lens_metadata_table.table_arn,
-                    f"{lens_metadata_table.table_arn}/index/*",
+        # Deploy into an existing VPC when one is given with "-c vpcId=vpc-...". The lookup
+        # result is cached in cdk.context.json, so later synths don't call AWS again
+        vpc_id = self.node.try_get_context("vpcId")
+        if vpc_id:
+            vpc = ec2.Vpc.from_lookup(self, "ECSVpc", vpc_id=vpc_id)
+        else:
+            # Create VPC to host the ECS cluster
+            vpc = ec2.Vpc(
+                self,
+                "ECSVpc",
+                ip_addresses=ec2.IpAddresses.cidr("10.0.0.0/16"),
+                max_azs=2,
+                nat_gateways=1,
+                subnet_configuration=[
+                    ec2.SubnetConfiguration(
+                        name="public", subnet_type=ec2.SubnetType.PUBLIC
+                    ),
+                    ec2.SubnetConfiguration(
+                        name="private", subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS
+                    ),
                 ],
+                # Keep S3 and DynamoDB traffic from the private subnets off the NAT gateway
+                gateway_endpoints={
+                    "S3": ec2.GatewayVpcEndpointOptions(
+                        service=ec2.GatewayVpcEndpointAwsService.S3
+                    ),
+                    "DynamoDB": ec2.GatewayVpcEndpointOptions(
+                        service=ec2.GatewayVpcEndpointAwsService.DYNAMODB
+                    ),
+                },
             )
-        )
-
-        # Create VPC to host the ECS cluster
-        vpc = ec2.Vpc(
-            self,
-            "ECSVpc",
-            ip_addresses=ec2.IpAddresses.cidr("10.0.0.0/16"),
-            max_azs=2,
-            nat_gateways=1,
-            subnet_configuration=[
-                ec2.SubnetConfiguration(
-                    name="public", subnet_type=ec2.SubnetType.PUBLIC
-                ),
-                ec2.SubnetConfiguration(
-                    name="private", subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS
-                ),
-            ],
-        )
 
         # Capture the public subnets
         public_subnets = vpc.select_subnets(subnet_type=ec2.SubnetType.PUBLIC)
 
         # Create ECS Cluster
-        ecs_cluster = ecs.Cluster(self, "AppCluster", vpc=vpc, container_insights_v2=ecs.ContainerInsights.ENABLED)
+        ecs_cluster = ecs.Cluster(
+            self,
+            "AppCluster",
+            vpc=vpc,
+            container_insights_v2=ecs.ContainerInsights.ENABLED,
+            enable_fargate_capacity_providers=True,
+        )
 
         # Add ECS Service Discovery namespace
         namespace = servicediscovery.PrivateDnsNamespace(
@@ -801,39 +921,45 @@ class WAGenAIStack(Stack):
             description="Security group for backend service",
         )
 
-        # Create frontend service with ALB
+        # Runtime platform shared by the frontend and backend task definitions
+        runtime_platform = ecs.RuntimePlatform(
+            operating_system_family=ecs.OperatingSystemFamily.LINUX,
+            cpu_architecture=ARCHITECTURE["fargate_architecture"],
+        )
+
+        # Create frontend service with ALB (HTTP-only unless authentication is enabled)
+        frontend_service_options = dict(
+            cluster=ecs_cluster,
+            runtime_platform=runtime_platform,
+            task_image_options=ecs_patterns.ApplicationLoadBalancedTaskImageOptions(
+                image=ecs.ContainerImage.from_docker_image_asset(frontend_image),
+                container_port=8080,
+                environment={
+                    # Use service discovery DNS name
+                    "VITE_API_URL": f"http://backend.internal:3000"
+                },
+            ),
+            public_load_balancer=public_lb,
+            security_groups=[frontend_security_group],
+        )
         if auth_config["enabled"]:
             # Create HTTPS listener with authentication
-            certificate = aws_certificatemanager.Certificate.from_certificate_arn(
-                self, "ALBCertificate", auth_config["certificateArn"]
-            )
-
-            frontend_service = ecs_patterns.ApplicationLoadBalancedFargateService(
-                self,
-                "FrontendService",
-                cluster=ecs_cluster,
-                runtime_platform=ecs.RuntimePlatform(
-                    operating_system_family=ecs.OperatingSystemFamily.LINUX,
-                    cpu_architecture=architecture["fargate_architecture"],
-                ),
-                task_image_options=ecs_patterns.ApplicationLoadBalancedTaskImageOptions(
-                    image=ecs.ContainerImage.from_docker_image_asset(frontend_image),
-                    container_port=8080,
-                    environment={
-                        # Use service discovery DNS name
-                        "VITE_API_URL": f"http://backend.internal:3000"
-                    },
+            frontend_service_options.update(
+                certificate=aws_certificatemanager.Certificate.from_certificate_arn(
+                    self, "ALBCertificate", auth_config["certificateArn"]
                 ),
-                public_load_balancer=public_lb,
-                security_groups=[frontend_security_group],
-                certificate=certificate,
                 redirect_http=True,
                 ssl_policy=elbv2.SslPolicy.RECOMMENDED_TLS,
             )
 
-            # Store reference to frontend target group
-            self.frontend_target_group = frontend_service.target_group
+        frontend_service = ecs_patterns.ApplicationLoadBalancedFargateService(
+            self, "FrontendService", **frontend_service_options
+        )
 
+        # Store reference to frontend target group
+        self.frontend_target_group = frontend_service.target_group
+
+        if auth_config["enabled"]:
             # Create Cognito resources once if using new Cognito
             user_pool = None
             client = None
@@ -871,7 +997,7 @@ class WAGenAIStack(Stack):
                     o_auth=aws_cognito.OAuthSettings(
                         flows=aws_cognito.OAuthFlows(authorization_code_grant=True),
                         scopes=[aws_cognito.OAuthScope.OPENID],
-                        callback_urls=auth_config["cognito"]["callbackUrls"],
+                        callback_urls=list(auth_config["cognito"]["callbackUrls"]),
                         logout_urls=logout_urls,
                     ),
                     auth_flows=aws_cognito.AuthFlow(user_password=True, user_srp=True),
@@ -887,12 +1013,17 @@ class WAGenAIStack(Stack):
                     use_cognito_provided_values=True,
                 )
 
-                # Update sign_out_url for new Cognito setup
+                # Update sign_out_url for new Cognito setup. The client id is a
+                # deploy-time token, so it is kept out of urlencode to stay resolvable.
+                query = urlencode(
+                    {
+                        "logout_uri": auth_config["cognito"]["logoutUrl"],
+                        "response_type": "code",
+                    }
+                )
                 sign_out_url = (
                     f"https://{auth_config['cognito']['domainPrefix']}.auth.{Stack.of(self).region}.amazoncognito.com/logout?"
-                    f"client_id={client.user_pool_client_id}&"
-                    f"logout_uri={auth_config['cognito']['logoutUrl']}&"
-                    "response_type=code"
+                    f"client_id={client.user_pool_client_id}&{query}"
                 )
 
             # Modify the default actions of the existing HTTPS listener
@@ -909,29 +1040,6 @@ class WAGenAIStack(Stack):
 
             # Remove any existing actions and add the auth action as the only action
             https_listener.add_action("DefaultAuth", action=auth_action)
-        else:
-            # HTTP-only ALB creation
-            frontend_service = ecs_patterns.ApplicationLoadBalancedFargateService(
-                self,
-                "FrontendService",
-                cluster=ecs_cluster,
-                runtime_platform=ecs.RuntimePlatform(
-                    operating_system_family=ecs.OperatingSystemFamily.LINUX,
-                    cpu_architecture=architecture["fargate_architecture"],
-                ),
-                task_image_options=ecs_patterns.ApplicationLoadBalancedTaskImageOptions(
-                    image=ecs.ContainerImage.from_docker_image_asset(frontend_image),
-                    container_port=8080,
-                    environment={
-                        # Use service discovery DNS name
-                        "VITE_API_URL": f"http://backend.internal:3000"
-                    },
-                ),
-                public_load_balancer=public_lb,
-                security_groups=[frontend_security_group],
-            )
-            # Store reference to frontend target group
-            self.frontend_target_group = frontend_service.target_group
 
         # Set ALB idle timeout to 60 minutes
         frontend_service.load_balancer.set_attribute(
@@ -960,14 +1068,14 @@ class WAGenAIStack(Stack):
         # Configure health check for ALB
         frontend_service.target_group.configure_health_check(path="/healthz")
 
+        # Ramp traffic up gradually on newly registered frontend tasks
+        frontend_service.target_group.set_attribute("slow_start.duration_seconds", "60")
+
         # Create backend service with service discovery
         backend_task_definition = ecs.FargateTaskDefinition(
             self,
             "BackendTaskDef",
-            runtime_platform=ecs.RuntimePlatform(
-                operating_system_family=ecs.OperatingSystemFamily.LINUX,
-                cpu_architecture=architecture["fargate_architecture"],
-            ),
+            runtime_platform=runtime_platform,
             task_role=app_execute_role,
         )
 
@@ -982,24 +1090,28 @@ class WAGenAIStack(Stack):
                 "FRONTEND_URL": f"http://{alb_dns}",
                 "AUTH_ENABLED": str(auth_config["enabled"]).lower(),
                 "AUTH_SIGN_OUT_URL": sign_out_url,
+                "STORAGE_ENABLED": "true",
+                "ANALYSIS_STORAGE_BUCKET": analysis_storage_bucket.bucket_name,
+                "ANALYSIS_METADATA_TABLE": analysis_metadata_table.table_name,
+                "LENS_METADATA_TABLE": lens_metadata_table.table_name,
             },
-            logging=ecs.LogDriver.aws_logs(stream_prefix="backend"),
+            port_mappings=[ecs.PortMapping(container_port=3000)],
+            # Backend logs include prompts and model responses, so cap how long they are kept
+            logging=ecs.LogDriver.aws_logs(
+                stream_prefix="backend", log_retention=logs.RetentionDays.ONE_WEEK
+            ),
         )
 
-        backend_container.add_port_mappings(ecs.PortMapping(container_port=3000))
-
-        # Environment variables for the backend service when auth is enabled
-        backend_container.add_environment("STORAGE_ENABLED", "true")
-
-        backend_container.add_environment(
-            "ANALYSIS_STORAGE_BUCKET", analysis_storage_bucket.bucket_name
-        )
-        backend_container.add_environment(
-            "ANALYSIS_METADATA_TABLE", analysis_metadata_table.table_name
-        )
-        backend_container.add_environment(
-            "LENS_METADATA_TABLE", lens_metadata_table.table_name
-        )
+        # Keep the first backend task on on-demand Fargate. Additional tasks go mostly on
+        # Spot, which only runs x86_64 Linux tasks, so ARM64 builds stay on plain Fargate
+        backend_capacity_providers = [
+            ecs.CapacityProviderStrategy(capacity_provider="FARGATE", base=1, weight=1)
+        ]
+        # (jsii CpuArchitecture values don't compare equal, so check the build argument)
+        if ARCHITECTURE["build_architecture_argument"] == "amd64":
+            backend_capacity_providers.append(
+                ecs.CapacityProviderStrategy(capacity_provider="FARGATE_SPOT", weight=4)
+            )
 
         # Create the backend service
         backend_service = ecs.FargateService(
@@ -1011,50 +1123,12 @@ class WAGenAIStack(Stack):
                 subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS
             ),
             security_groups=[backend_security_group],
+            capacity_provider_strategies=backend_capacity_providers,
         )
 
         # Add service discovery
         backend_service.enable_cloud_map(cloud_map_namespace=namespace, name="backend")
 
-        deployment_timestamp = int(time.time())
-
-        # Custom resource to trigger the KB Lambda synchronizer during deployment
-        kb_lambda_trigger_cr = cr.AwsCustomResource(
-            self,
-            "KbLambdaTrigger",
-            on_create=cr.AwsSdkCall(
-                service="Lambda",
-                action="invoke",
-                parameters={
-                    "FunctionName": kb_lambda_synchronizer.function_name,
-                    "InvocationType": "Event",
-                },
-                physical_resource_id=cr.PhysicalResourceId.of(
-                    f"KbLambdaSynchronizerTrigger-{deployment_timestamp}"
-                ),
-            ),
-            on_update=cr.AwsSdkCall(
-                service="Lambda",
-                action="invoke",
-                parameters={
-                    "FunctionName": kb_lambda_synchronizer.function_name,
-                    "InvocationType": "Event",
-                },
-                physical_resource_id=cr.PhysicalResourceId.of(
-                    f"KbLambdaSynchronizerTrigger-{deployment_timestamp}"
-                ),
-            ),
-            # Use explicit IAM policy statement instead of from_sdk_calls
-            policy=cr.AwsCustomResourcePolicy.from_statements(
-                [
-                    iam.PolicyStatement(
-                        actions=["lambda:InvokeFunction"],
-                        resources=[kb_lambda_synchronizer.function_arn],
-                    )
-                ]
-            ),
-        )
-
         # Migration Lambda function for transitioning from single-lens to multi-lens storage structure
         # The new multi-lenses support introduced on 14-April-2025 is a breaking change. This function is meant to support a seamless transition from previous single-lens (wellarchitected) storage structure to the new multi-lens structure.
         # The Lambda will only run at cdk deployment time once and only for deployments where the old single-lens structure is detected.
@@ -1063,16 +1137,9 @@ class WAGenAIStack(Stack):
             "MigrationLambda",
             runtime=lambda_.Runtime.PYTHON_3_12,
             handler="migration.handler",
+            # Only needs the boto3 shipped with the runtime, so no bundling container
             code=lambda_.Code.from_asset(
-                "ecs_fargate_app/lambda_migration",
-                bundling=cdk.BundlingOptions(
-                    image=lambda_.Runtime.PYTHON_3_12.bundling_image,
-                    command=[
-                        "bash",
-                        "-c",
-                        "pip install --no-cache -r requirements.txt -t /asset-output && cp -au . /asset-output",
-                    ],
-                ),
+                "ecs_fargate_app/lambda_migration", exclude=["__pycache__"]
             ),
             environment={
                 "ANALYSIS_METADATA_TABLE": analysis_metadata_table.table_name,
@@ -1089,113 +1156,122 @@ class WAGenAIStack(Stack):
         analysis_storage_bucket.grant_read_write(migration_lambda)
         wafrReferenceDocsBucket.grant_read_write(migration_lambda)
 
-        # Create a custom resource to trigger migration Lambda after KB synchronization
-        migration_trigger_cr = cr.AwsCustomResource(
-            self,
-            "MigrationTrigger",
-            on_create=cr.AwsSdkCall(
-                service="Lambda",
-                action="invoke",
-                parameters={
-                    "FunctionName": migration_lambda.function_name,
-                    "InvocationType": "Event",
-                },
-                physical_resource_id=cr.PhysicalResourceId.of("MigrationLambdaTrigger"),
-            ),
-            policy=cr.AwsCustomResourcePolicy.from_sdk_calls(
-                resources=cr.AwsCustomResourcePolicy.ANY_RESOURCE
-            ),
+        # Re-run the synchronizer (which ends with an ingestion job) only when its code, the
+        # bundled reference docs or the KB it feeds change; the weekly rule above keeps the
+        # downloaded lens documents fresh between deployments
+        synchronizer_source_hash = cdk.FileSystem.fingerprint(
+            "ecs_fargate_app/lambda_kb_synchronizer", exclude=["__pycache__"]
         )
-
-        migration_lambda.grant_invoke(migration_trigger_cr)
-
-        # Conditionally create stack cleanup resources if auto_cleanup is enabled
-        if auto_cleanup:
-            self.create_stack_cleanup_resources()
-
-        # Output the frontend ALB DNS name
-        cdk.CfnOutput(
-            self,
-            "FrontendURL",
-            value=frontend_service.load_balancer.load_balancer_dns_name,
-            description="Frontend application URL",
+        reference_docs_hash = cdk.FileSystem.fingerprint(
+            "ecs_fargate_app/well_architected_docs", exclude=[".DS_Store", "*.md"]
         )
 
-        # Output the ID of the Bedrock knowledge base
-        cdk.CfnOutput(
+        # Allow the deployment resources provider to invoke the post-deployment functions
+        # (a separate policy, as the synchronizer already depends on the provider's default policy)
+        deployment_trigger_policy = iam.Policy(
             self,
-            "KnowledgeBaseID",
-            value=KB_ID,
-            description="ID of the Bedrock knowledge base",
+            "DeploymentTriggerPolicy",
+            statements=[
+                iam.PolicyStatement(
+                    actions=["lambda:InvokeFunction"],
+                    resources=[
+                        kb_lambda_synchronizer.function_arn,
+                        migration_lambda.function_arn,
+                    ],
+                )
+            ],
+            roles=[deployment_resources_lambda.role],
         )
 
-        # Output S3 bucket (Source of Bedrock knowledge base) with well-architected documents.
-        cdk.CfnOutput(
+        # Trigger the KB Lambda synchronizer when its inputs change, then the migration Lambda on the first deployment
+        deployment_trigger_cr = cdk.CustomResource(
             self,
-            "WellArchitectedDocsS3Bucket",
-            value=wafrReferenceDocsBucket.bucket_name,
-            description="S3 bucket (Source of Bedrock knowledge base) with well-architected documents.",
+            "DeploymentLambdaTrigger",
+            service_token=deployment_resources_provider.service_token,
+            properties={
+                "Action": "invoke",
+                "FunctionNames": [kb_lambda_synchronizer.function_name],
+                "CreateOnlyFunctionNames": [migration_lambda.function_name],
+                "KnowledgeBaseId": KB_ID,
+                "DataSourceId": kbDataSource.data_source_id,
+                "SynchronizerSourceHash": synchronizer_source_hash,
+                "ReferenceDocsHash": reference_docs_hash,
+            },
         )
+        deployment_trigger_cr.node.add_dependency(deployment_trigger_policy)
+        # Re-sync only after updated reference docs have landed in the bucket
+        deployment_trigger_cr.node.add_dependency(wafrReferenceDeploy)
 
-        # Output the VPC ID
-        cdk.CfnOutput(
-            self,
-            "VpcId",
-            value=vpc.vpc_id,
-            description="ID of the VPC where the private ALB is created",
-        )
+        # Conditionally create stack cleanup resources if auto_cleanup is enabled
+        if self._auto_cleanup:
+            self.create_stack_cleanup_resources()
 
-        # Output the ID of the first public subnet
-        cdk.CfnOutput(
-            self,
-            "PublicSubnetId",
-            value=public_subnets.subnet_ids[0],
-            description="ID of the public subnet created in the VPC",
-        )
+        # Stack outputs as (name, value, description)
+        outputs = [
+            (
+                "FrontendURL",
+                frontend_service.load_balancer.load_balancer_dns_name,
+                "Frontend application URL",
+            ),
+            ("KnowledgeBaseID", KB_ID, "ID of the Bedrock knowledge base"),
+            (
+                "WellArchitectedDocsS3Bucket",
+                wafrReferenceDocsBucket.bucket_name,
+                "S3 bucket (Source of Bedrock knowledge base) with well-architected documents.",
+            ),
+            ("VpcId", vpc.vpc_id, "ID of the VPC where the private ALB is created"),
+            (
+                "PublicSubnetId",
+                public_subnets.subnet_ids[0],
+                "ID of the public subnet created in the VPC",
+            ),
+        ]
 
-        # Add authentication configuration outputs
+        # Authentication configuration outputs
         if auth_config["enabled"]:
-            cdk.CfnOutput(
-                self,
-                "AuthenticationType",
-                value=auth_config["authType"],
-                description="Type of authentication configured",
+            outputs.append(
+                (
+                    "AuthenticationType",
+                    auth_config["authType"],
+                    "Type of authentication configured",
+                )
             )
-
             if auth_config["authType"] in ["new-cognito", "existing-cognito"]:
-                cdk.CfnOutput(
-                    self,
-                    "CognitoDomain",
-                    value=(
-                        f"{auth_config['cognito']['domainPrefix']}.auth.{self.region}.amazoncognito.com"
-                        if auth_config["authType"] == "new-cognito"
-                        else auth_config["cognito"]["domain"]
-                    ),
-                    description="Cognito domain for authentication",
+                outputs.append(
+                    (
+                        "CognitoDomain",
+                        (
+                            f"{auth_config['cognito']['domainPrefix']}.auth.{self.region}.amazoncognito.com"
+                            if auth_config["authType"] == "new-cognito"
+                            else auth_config["cognito"]["domain"]
+                        ),
+                        "Cognito domain for authentication",
+                    )
                 )
 
-        # Outputs for the storage resources
-        cdk.CfnOutput(
-            self,
-            "AnalysisStorageBucketName",
-            value=analysis_storage_bucket.bucket_name,
-            description="S3 bucket for storing analysis results",
-        )
-
-        cdk.CfnOutput(
-            self,
-            "AnalysisMetadataTableName",
-            value=analysis_metadata_table.table_name,
-            description="DynamoDB table for analysis metadata",
-        )
+        # Storage resources outputs
+        outputs += [
+            (
+                "AnalysisStorageBucketName",
+                analysis_storage_bucket.bucket_name,
+                "S3 bucket for storing analysis results",
+            ),
+            (
+                "AnalysisMetadataTableName",
+                analysis_metadata_table.table_name,
+                "DynamoDB table for analysis metadata",
+            ),
+            (
+                "LensMetadataTableName",
+                lens_metadata_table.table_name,
+                "DynamoDB table for lens metadata",
+            ),
+        ]
 
-        # Output lens metadata table name
-        cdk.CfnOutput(
-            self,
-            "LensMetadataTableName",
-            value=lens_metadata_table.table_name,
-            description="DynamoDB table for lens metadata",
-        )
+        for output_name, output_value, output_description in outputs:
+            cdk.CfnOutput(
+                self, output_name, value=output_value, description=output_description
+            )
 
         # Node dependencies
         kbDataSource.node.add_dependency(wafrReferenceDocsBucket)
@@ -1205,13 +1281,6 @@ class WAGenAIStack(Stack):
         kb_lambda_synchronizer.node.add_dependency(wafrReferenceDocsBucket)
         kb_lambda_synchronizer.node.add_dependency(workload_cr)
 
-        kb_lambda_trigger_cr.node.add_dependency(kb_lambda_synchronizer)
-        kb_lambda_trigger_cr.node.add_dependency(kb)
-        kb_lambda_trigger_cr.node.add_dependency(kbDataSource)
-        kb_lambda_trigger_cr.node.add_dependency(wafrReferenceDocsBucket)
-        kb_lambda_trigger_cr.node.add_dependency(workload_cr)
-
-        migration_trigger_cr.node.add_dependency(kb_lambda_trigger_cr)
-        migration_lambda.node.add_dependency(analysis_metadata_table)
-        migration_lambda.node.add_dependency(analysis_storage_bucket)
-        migration_lambda.node.add_dependency(wafrReferenceDocsBucket)
+        # The trigger reaches the KB, data source, docs bucket and test workload through the
+        # synchronizer, and the migration Lambda references its tables and buckets directly
+        deployment_trigger_cr.node.add_dependency(kb_lambda_synchronizer)
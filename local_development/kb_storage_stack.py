@@ -1,7 +1,7 @@
 """CDK stack for deploying only Knowledge Base and Storage resources"""
 
-import time
-import uuid
+import hashlib
+import os
 
 import aws_cdk as cdk
 from aws_cdk import CfnOutput, CfnParameter, Duration, RemovalPolicy, Stack
@@ -16,6 +16,10 @@ from aws_cdk import custom_resources as cr
 from cdklabs.generative_ai_cdk_constructs import bedrock
 from constructs import Construct
 
+# Host pip cache mounted into the KB synchronizer bundling container so wheels
+# downloaded by one synth are reused when that asset is bundled again
+PIP_CACHE_DIR = os.path.join(os.getcwd(), ".pip-cache")
+
 
 class KBStorageStack(Stack):
     """CDK Stack for deploying only Knowledge Base and Storage resources"""
@@ -23,6 +27,9 @@ class KBStorageStack(Stack):
     def __init__(self, scope: Construct, construct_id: str, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
 
+        # Docker would otherwise create the bind-mounted pip cache owned by root
+        os.makedirs(PIP_CACHE_DIR, exist_ok=True)
+
         # Context parameters
         deploy_storage = self.node.try_get_context("deploy_storage")
         if deploy_storage is None:  # Default to true if not specified
@@ -37,7 +44,8 @@ class KBStorageStack(Stack):
             description="This knowledge base contains AWS Well Architected Framework Review (WAFR) reference documents",
         )
 
-        random_id = str(uuid.uuid4())[:8]  # First 8 characters of a UUID
+        # Stable 8-character suffix derived from the stack id so repeated synths produce the same template
+        random_id = hashlib.blake2s(construct_id.encode(), digest_size=4).hexdigest()
 
         KB_ID = kb.knowledge_base_id
 
@@ -66,9 +74,21 @@ class KBStorageStack(Stack):
         wafrReferenceDeploy = s3deploy.BucketDeployment(
             self,
             "uploadwellarchitecteddocs",
-            sources=[s3deploy.Source.asset("../ecs_fargate_app/well_architected_docs")],
+            # Static docs need no bundling; keep OS clutter out of the zip and its hash
+            sources=[
+                s3deploy.Source.asset(
+                    "../ecs_fargate_app/well_architected_docs",
+                    asset_hash_type=cdk.AssetHashType.SOURCE,
+                    exclude=[".DS_Store", "*.md"],
+                )
+            ],
             destination_bucket=wafrReferenceDocsBucket,
             destination_key_prefix="wellarchitected",
+            # More memory gives the upload Lambda more CPU and network throughput
+            memory_limit=1024,
+            ephemeral_storage_size=cdk.Size.mebibytes(1024),
+            # Keep objects the KB synchronizer adds under the same prefix (e.g. .metadata.json files)
+            prune=False,
         )
 
         WA_DOCS_BUCKET_NAME = wafrReferenceDocsBucket.bucket_name
@@ -85,25 +105,53 @@ class KBStorageStack(Stack):
             ),
         )
 
-        # Data Ingestion Params
-        dataSourceIngestionParams = {
-            "dataSourceId": kbDataSource.data_source_id,
-            "knowledgeBaseId": KB_ID,
-        }
+        # Lambda-backed provider for the deployment-time custom resources below
+        deployment_resources_lambda = lambda_.Function(
+            self,
+            "DeploymentResourcesLambda",
+            runtime=lambda_.Runtime.PYTHON_3_12,
+            handler="deployment_resources.handler",
+            code=lambda_.Code.from_asset(
+                "../ecs_fargate_app/lambda_deployment_resources"
+            ),
+            timeout=Duration.minutes(1),
+            initial_policy=[
+                iam.PolicyStatement(
+                    effect=iam.Effect.ALLOW,
+                    actions=["bedrock:StartIngestionJob"],
+                    resources=[kb.knowledge_base_arn],
+                ),
+                iam.PolicyStatement(
+                    effect=iam.Effect.ALLOW,
+                    actions=["wellarchitected:CreateWorkload"],
+                    resources=["*"],
+                ),
+                iam.PolicyStatement(
+                    effect=iam.Effect.ALLOW,
+                    actions=["wellarchitected:DeleteWorkload"],
+                    resources=[
+                        f"arn:aws:wellarchitected:{self.region}:{self.account}:workload/*"
+                    ],
+                ),
+            ],
+        )
+
+        deployment_resources_provider = cr.Provider(
+            self,
+            "DeploymentResourcesProvider",
+            on_event_handler=deployment_resources_lambda,
+        )
 
-        # Define a custom resource to make an AwsSdk startIngestionJob call
-        ingestion_job_cr = cr.AwsCustomResource(
+        # Start the initial Knowledge Base ingestion job
+        ingestion_job_cr = cdk.CustomResource(
             self,
             "IngestionCustomResource",
-            on_create=cr.AwsSdkCall(
-                service="bedrock-agent",
-                action="startIngestionJob",
-                parameters=dataSourceIngestionParams,
-                physical_resource_id=cr.PhysicalResourceId.of("Parameter.ARN"),
-            ),
-            policy=cr.AwsCustomResourcePolicy.from_sdk_calls(
-                resources=cr.AwsCustomResourcePolicy.ANY_RESOURCE
-            ),
+            service_token=deployment_resources_provider.service_token,
+            properties={
+                "Action": "ingest",
+                "KnowledgeBaseId": KB_ID,
+                "DataSourceId": kbDataSource.data_source_id,
+            },
         )
 
         # Params for the test Well-Architected Workload
@@ -115,39 +163,13 @@ class KBStorageStack(Stack):
             "Environment": "PREPRODUCTION",
             "AwsRegions": [test_workload_region],
             "Lenses": ["wellarchitected"],
-            "ClientRequestToken": random_id,
         }
         # Create a test Well-Architected Workload
-        workload_cr = cr.AwsCustomResource(
+        workload_cr = cdk.CustomResource(
             self,
             "TestWorkload",
-            on_create=cr.AwsSdkCall(
-                service="wellarchitected",
-                action="createWorkload",
-                parameters=waToolWorkloadParams,
-                physical_resource_id=cr.PhysicalResourceId.from_response("WorkloadId"),
-                output_paths=["WorkloadId"],
-            ),
-            on_update=cr.AwsSdkCall(
-                service="wellarchitected",
-                action="listLensReviews",
-                parameters={
-                    "WorkloadId": cr.PhysicalResourceIdReference(),
-                },
-                physical_resource_id=cr.PhysicalResourceId.from_response("WorkloadId"),
-                output_paths=["WorkloadId"],
-            ),
-            on_delete=cr.AwsSdkCall(
-                service="wellarchitected",
-                action="deleteWorkload",
-                parameters={
-                    "WorkloadId": cr.PhysicalResourceIdReference(),
-                    "ClientRequestToken": random_id,
-                },
-            ),
-            policy=cr.AwsCustomResourcePolicy.from_sdk_calls(
-                resources=cr.AwsCustomResourcePolicy.ANY_RESOURCE
-            ),
+            service_token=deployment_resources_provider.service_token,
+            properties={"Action": "workload", "Workload": waToolWorkloadParams},
         )
 
         # Lambda function to refresh and sync Knowledge Base with data source
@@ -163,96 +185,106 @@ class KBStorageStack(Stack):
                     command=[
                         "bash",
                         "-c",
-                        "pip install --no-cache -r requirements.txt -t /asset-output && cp -au . /asset-output",
+                        "pip install -r requirements.txt -t /asset-output && cp -au . /asset-output",
                     ],
+                    volumes=[
+                        cdk.DockerVolume(
+                            host_path=PIP_CACHE_DIR, container_path="/tmp/pip-cache"
+                        )
+                    ],
+                    environment={"PIP_CACHE_DIR": "/tmp/pip-cache"},
                 ),
+                # Source hashing lets CDK skip re-bundling when the asset is already staged
+                asset_hash_type=cdk.AssetHashType.SOURCE,
+                exclude=["__pycache__"],
             ),
             environment={
                 "KNOWLEDGE_BASE_ID": KB_ID,
                 "DATA_SOURCE_ID": kbDataSource.data_source_id,
                 "WA_DOCS_BUCKET_NAME": wafrReferenceDocsBucket.bucket_name,
-                "WORKLOAD_ID": workload_cr.get_response_field("WorkloadId"),
+                "WORKLOAD_ID": workload_cr.get_att_string("WorkloadId"),
                 "LENS_METADATA_TABLE": lens_metadata_table.table_name,
             },
             timeout=Duration.minutes(15),
-        )
-
-        # Grant permissions to the KB synchronizer Lambda
-        kb_lambda_synchronizer.add_to_role_policy(
-            iam.PolicyStatement(
-                actions=["bedrock:StartIngestionJob"],
-                resources=[
-                    f"arn:aws:bedrock:{self.region}:{self.account}:knowledge-base/{KB_ID}"
-                ],
-            )
-        )
-        kb_lambda_synchronizer.add_to_role_policy(
-            iam.PolicyStatement(
-                actions=[
-                    "wellarchitected:GetLensReview",
-                    "wellarchitected:ListAnswers",
-                    "wellarchitected:UpgradeLensReview",
-                    "wellarchitected:AssociateLenses",
-                    "wellarchitected:DisassociateLenses",
-                ],
-                resources=["*"],
-            )
+            # Up to six pillar PDFs plus the lens prefetch are held in memory at once,
+            # along with multipart upload buffers, so the 128MB default is too small
+            memory_size=1024,
+            initial_policy=[
+                iam.PolicyStatement(
+                    actions=["bedrock:StartIngestionJob"],
+                    resources=[
+                        f"arn:aws:bedrock:{self.region}:{self.account}:knowledge-base/{KB_ID}"
+                    ],
+                ),
+                iam.PolicyStatement(
+                    actions=[
+                        "wellarchitected:GetLensReview",
+                        "wellarchitected:ListAnswers",
+                        "wellarchitected:UpgradeLensReview",
+                        "wellarchitected:AssociateLenses",
+                        "wellarchitected:DisassociateLenses",
+                    ],
+                    resources=["*"],
+                ),
+            ],
         )
 
         # Grant Lambda access to the lens metadata table
         lens_metadata_table.grant_read_write_data(kb_lambda_synchronizer)
 
-        # Grant Lambda access to the WA docs bucket
+        # Grant Lambda access to the WA docs bucket (read is needed to skip unchanged uploads)
         wafrReferenceDocsBucket.grant_put(kb_lambda_synchronizer)
+        wafrReferenceDocsBucket.grant_read(kb_lambda_synchronizer)
 
         # Create EventBridge rule to trigger KbLambdaSynchronizer weekly on Mondays
         events.Rule(
             self,
             "WeeklyIngestionRule",
-            schedule=events.Schedule.cron(
-                minute="0", hour="0", month="*", week_day="2", year="*"
-            ),
+            schedule=events.Schedule.expression("cron(0 0 ? * 2 *)"),
             targets=[targets.LambdaFunction(kb_lambda_synchronizer)],
         )
 
-        deployment_timestamp = int(time.time())
+        # Re-run the synchronizer (which ends with an ingestion job) only when its code, the
+        # bundled reference docs or the KB it feeds change; the weekly rule above keeps the
+        # downloaded lens documents fresh between deployments
+        synchronizer_source_hash = cdk.FileSystem.fingerprint(
+            "../ecs_fargate_app/lambda_kb_synchronizer", exclude=["__pycache__"]
+        )
+        reference_docs_hash = cdk.FileSystem.fingerprint(
+            "../ecs_fargate_app/well_architected_docs", exclude=[".DS_Store", "*.md"]
+        )
+
+        # Allow the deployment resources provider to invoke the KB synchronizer
+        # (a separate policy, as the synchronizer already depends on the provider's default policy)
+        deployment_trigger_policy = iam.Policy(
+            self,
+            "DeploymentTriggerPolicy",
+            statements=[
+                iam.PolicyStatement(
+                    actions=["lambda:InvokeFunction"],
+                    resources=[kb_lambda_synchronizer.function_arn],
+                )
+            ],
+            roles=[deployment_resources_lambda.role],
+        )
 
         # Custom resource to trigger the KB Lambda synchronizer during deployment
-        kb_lambda_trigger_cr = cr.AwsCustomResource(
+        kb_lambda_trigger_cr = cdk.CustomResource(
             self,
             "KbLambdaTrigger",
-            on_create=cr.AwsSdkCall(
-                service="Lambda",
-                action="invoke",
-                parameters={
-                    "FunctionName": kb_lambda_synchronizer.function_name,
-                    "InvocationType": "Event",
-                },
-                physical_resource_id=cr.PhysicalResourceId.of(
-                    f"KbLambdaSynchronizerTrigger-{deployment_timestamp}"
-                ),
-            ),
-            on_update=cr.AwsSdkCall(
-                service="Lambda",
-                action="invoke",
-                parameters={
-                    "FunctionName": kb_lambda_synchronizer.function_name,
-                    "InvocationType": "Event",
-                },
-                physical_resource_id=cr.PhysicalResourceId.of(
-                    f"KbLambdaSynchronizerTrigger-{deployment_timestamp}"
-                ),
-            ),
-            # Use explicit IAM policy statement instead of from_sdk_calls
-            policy=cr.AwsCustomResourcePolicy.from_statements(
-                [
-                    iam.PolicyStatement(
-                        actions=["lambda:InvokeFunction"],
-                        resources=[kb_lambda_synchronizer.function_arn],
-                    )
-                ]
-            ),
+            service_token=deployment_resources_provider.service_token,
+            properties={
+                "Action": "invoke",
+                "FunctionNames": [kb_lambda_synchronizer.function_name],
+                "KnowledgeBaseId": KB_ID,
+                "DataSourceId": kbDataSource.data_source_id,
+                "SynchronizerSourceHash": synchronizer_source_hash,
+                "ReferenceDocsHash": reference_docs_hash,
+            },
         )
+        kb_lambda_trigger_cr.node.add_dependency(deployment_trigger_policy)
+        # Re-sync only after updated reference docs have landed in the bucket
+        kb_lambda_trigger_cr.node.add_dependency(wafrReferenceDeploy)
 
         # Define storage resources if deploy_storage is true
         analysis_storage_bucket = None